@@ -0,0 +1,528 @@
+#!/usr/bin/python
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import configindex
+import configstore
+import mvcm
+import numpy as np
+import pandas as pd
+from business import BusinessController, ExcelParser, CCS_SERVER_EXCLUDED_COLUMNS
+
+#
+# Benchmarks of the Mvcm client and BusinessController against the local
+# stand-in server (fake_mvcm.py, started in a subprocess so its memory
+# doesn't count towards ours).  Every benchmark runs in a process of its
+# own and reports p50/p99/mean latency, throughput, that process's peak
+# RSS and how far the benchmark raised it above the setup's.  The run is
+# written to a JSON file that can be compared against an earlier run:
+#
+#     python benchmark.py --output bench_results.json
+#     python benchmark.py --baseline bench_results.json --threshold 0.2
+#
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Shape of the inventory sheet the ExcelParser benchmarks convert
+EXCEL_ROWS = 20000
+EXCEL_COLUMNS = 40
+SAVED_CONFIGS = 5000
+USER = 'bench'
+PASSWORD = 'bench'
+
+# (name, function) in registration order
+BENCHMARKS = []
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS.append((name, fn))
+        return fn
+    return register
+
+
+#
+# Peak resident set size of this process in bytes, or None if the platform
+# doesn't tell us
+#
+def peak_rss():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+#
+# Runs op() `iterations` times (after `warmup` untimed runs) and returns the
+# latency/throughput summary.  bytes_per_op turns it into a transfer rate.
+#
+def measure(op, iterations, warmup=1, bytes_per_op=None):
+    for _ in range(warmup):
+        op()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, bytes_per_op)
+
+
+def summarize(latencies, elapsed, bytes_per_op=None):
+    result = {
+        'iterations': len(latencies),
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'mean': sum(latencies) / len(latencies) if latencies else None,
+        'min': min(latencies) if latencies else None,
+        'max': max(latencies) if latencies else None,
+        'ops_per_sec': len(latencies) / elapsed if elapsed > 0 else None,
+    }
+    if bytes_per_op:
+        result['bytes_per_op'] = bytes_per_op
+        result['bytes_per_sec'] = bytes_per_op * len(latencies) / elapsed if elapsed > 0 else None
+    return result
+
+
+#
+# Everything a benchmark needs: the stand-in host, a scratch directory and
+# a logged-on controller
+#
+class BenchContext:
+
+    def __init__(self, host, workdir, iterations, zip_size):
+        self.host = host
+        self.workdir = workdir
+        self.iterations = iterations
+        self.zip_size = zip_size
+        self.sessions = mvcm.SessionManager(encrypted=False)
+        self.archive = configstore.ConfigStore(os.path.join(workdir, 'archive'))
+        self.controller = BusinessController(mvcm.Mvcm(encrypted=False), self.sessions, self.archive)
+        self.controller.connect(host, USER, PASSWORD)
+        self.client = self.controller.mvcm
+        # logs come from a fixed server; point it at the stand-in too
+        self.client.log_host = host
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def close(self):
+        self.sessions.close()
+
+
+# -------------------------------
+# Mvcm benchmarks
+# -------------------------------
+@benchmark('mvcm.connect')
+def bench_connect(ctx):
+    def op():
+        client = mvcm.Mvcm(encrypted=False)
+        client.connect(ctx.host, USER, PASSWORD)
+        client.close()
+    return measure(op, max(ctx.iterations // 5, 5))
+
+
+@benchmark('mvcm.get_saved_configurations')
+def bench_get_list(ctx):
+    return measure(lambda: ctx.client.get('/saved-configurations'), ctx.iterations)
+
+
+@benchmark('mvcm.post_ccs_server')
+def bench_post_ccs_server(ctx):
+    counter = iter(range(10 ** 9))
+    body = {'description': 'benchmark server', 'host': 'localhost', 'port': 3270}
+    return measure(lambda: ctx.client.post(f'/ccs/servers/BENCH{next(counter):06d}', body, retry=True),
+                   ctx.iterations)
+
+
+@benchmark('mvcm.getlog')
+def bench_getlog(ctx):
+    return measure(lambda: ctx.client.getlog('BENCHLOG'), ctx.iterations)
+
+
+@benchmark('mvcm.getlog_tail')
+def bench_getlog_tail(ctx):
+    return measure(lambda: ctx.client.getlog_tail('BENCHLOG', 3), ctx.iterations)
+
+
+@benchmark('async.post_ccs_server_fanout')
+def bench_async_fanout(ctx):
+    count = ctx.iterations * 4
+
+    async def run():
+        client = mvcm.AsyncMvcm(ctx.client, max_concurrency=mvcm.DEFAULT_POOL_SIZE)
+        latencies = []
+
+        async def one(i):
+            t = time.perf_counter()
+            await client.post(f'/ccs/servers/ASYNC{i:06d}', {'description': 'fan-out'}, retry=True)
+            latencies.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - start
+        client.executor.shutdown(wait=True)
+        return summarize(latencies, elapsed)
+
+    return asyncio.run(run())
+
+
+@benchmark('controller.create_ccs_servers_bulk')
+def bench_create_bulk(ctx):
+    # The per-call latencies come from create_ccs_servers_bulk's own results
+    count = ctx.iterations * 4
+    rows = [{'name': f'FAN{i:06d}', 'description': 'fan-out'} for i in range(count)]
+    start = time.perf_counter()
+    results = ExcelParser().create_ccs_servers_bulk(ctx.client, rows, max_workers=mvcm.DEFAULT_POOL_SIZE)
+    elapsed = time.perf_counter() - start
+    return summarize([r['latency'] for r in results], elapsed)
+
+
+# -------------------------------
+# BusinessController benchmarks
+# -------------------------------
+class DownloadInterrupted(Exception):
+    pass
+
+
+#
+# Half of the archive is already on disk: times fetching the rest with a
+# Range request conditional on the ETag (If-Range)
+#
+@benchmark('mvcm.download_resume')
+def bench_download_resume(ctx):
+    path = '/saved-configurations/config_000'
+    dest = ctx.path('resume.zip')
+    # the first download makes the stand-in build the archive
+    size = ctx.client.download(path, dest)['size']
+
+    def interrupt(done, total):
+        if done >= size // 2:
+            raise DownloadInterrupted()
+
+    latencies = []
+    elapsed = 0.0
+    for _ in range(max(ctx.iterations // 10, 3)):
+        try:
+            ctx.client.download(path, dest, progress=interrupt, resume=True)
+        except DownloadInterrupted:
+            pass
+        t = time.perf_counter()
+        result = ctx.client.download(path, dest, resume=True)
+        latencies.append(time.perf_counter() - t)
+        elapsed += latencies[-1]
+        if not result['resumed_from']:
+            raise RuntimeError('the stand-in did not resume the download')
+    return summarize(latencies, elapsed, bytes_per_op=result['bytes'])
+
+
+@benchmark('controller.get_saved_configurations_cached')
+def bench_controller_list(ctx):
+    return measure(ctx.controller.get_saved_configurations, ctx.iterations)
+
+
+@benchmark('controller.create_configuration')
+def bench_create_configuration(ctx):
+    counter = iter(range(10 ** 9))
+    return measure(lambda: ctx.controller.create_configuration(f'bench_{next(counter):06d}', 'benchmark'),
+                   max(ctx.iterations // 5, 5))
+
+
+@benchmark('controller.download_configuration')
+def bench_download(ctx):
+    dest = ctx.path('download.zip')
+    # the first download makes the stand-in build the archive
+    ctx.controller.download_configuration('config_000', dest)
+    size = os.path.getsize(dest)
+    return measure(lambda: ctx.controller.download_configuration('config_000', dest),
+                   max(ctx.iterations // 10, 3), bytes_per_op=size)
+
+
+#
+# Every configuration on the stand-in, pulled in parallel
+#
+@benchmark('controller.download_configurations_batch')
+def bench_download_batch(ctx):
+    names = [config['name'] for config in ctx.controller.get_saved_configurations()]
+    dest_dir = ctx.path('batch')
+    summary = ctx.controller.download_configurations(names, dest_dir)
+    return measure(lambda: ctx.controller.download_configurations(names, dest_dir),
+                   max(ctx.iterations // 20, 3), bytes_per_op=summary['bytes'])
+
+
+@benchmark('controller.upload_configuration')
+def bench_upload(ctx):
+    src = ctx.path('upload.zip')
+    if not os.path.exists(src):
+        ctx.controller.download_configuration('config_000', src)
+    return measure(lambda: ctx.controller.upload_configuration(src),
+                   max(ctx.iterations // 10, 3), bytes_per_op=os.path.getsize(src))
+
+
+# -------------------------------
+# ExcelParser benchmarks
+# -------------------------------
+#
+# A cleaned sheet as read_excel leaves it: the reference columns, then a
+# mix of int, float, text and half-empty (object) columns
+#
+def inventory_frame(rows=EXCEL_ROWS, columns=EXCEL_COLUMNS):
+    rnd = np.random.default_rng(0)
+    data = {'name': [f'CCS{i:06d}' for i in range(rows)]}
+    for header in CCS_SERVER_EXCLUDED_COLUMNS:
+        data[header] = rnd.integers(0, 9999, rows)
+    for i in range(columns - len(data)):
+        kind = i % 4
+        if kind == 0:
+            data[f'int{i}'] = rnd.integers(0, 10 ** 6, rows)
+        elif kind == 1:
+            data[f'float{i}'] = rnd.random(rows)
+        elif kind == 2:
+            data[f'text{i}'] = [f'value {j}' for j in rnd.integers(0, 1000, rows)]
+        else:
+            column = rnd.random(rows)
+            column[::3] = np.nan
+            data[f'sparse{i}'] = column
+    return pd.DataFrame(data).fillna('')
+
+
+#
+# The sheet as stream_excel yields it: tuples of plain Python values, with
+# a date column so the per-column cast in json_batches has work to do
+#
+def inventory_rows(rows=EXCEL_ROWS, columns=EXCEL_COLUMNS):
+    df = inventory_frame(rows, columns)
+    df['installed'] = [datetime(2020, 1, 1).date() + timedelta(days=i % 1000) for i in range(rows)]
+    return df.columns.tolist(), list(zip(*(df[header].tolist() for header in df.columns)))
+
+
+@benchmark('excel.stream_payloads')
+def bench_stream_payloads(ctx):
+    headers, rows = inventory_rows()
+
+    def op():
+        for batch in ExcelParser.json_batches(headers, rows, exclude=CCS_SERVER_EXCLUDED_COLUMNS):
+            pass
+    return measure(op, max(ctx.iterations // 10, 3))
+
+
+# -------------------------------
+# Saved configuration filter benchmarks
+# -------------------------------
+def saved_configs(count=SAVED_CONFIGS):
+    rnd = np.random.default_rng(0)
+    users = [f'user{i}' for i in range(40)]
+    return [{'name': f'{env}_nightly_{i:05d}',
+             'description': f'Nightly snapshot {i} of the {env} console',
+             'user': users[rnd.integers(0, len(users))],
+             'date': f'2024-{rnd.integers(1, 13):02d}-{rnd.integers(1, 29):02d} 02:{i % 60:02d}:00'}
+            for i, env in zip(range(count), ['chandler', 'omaha', 'test', 'dev'] * count)]
+
+
+@benchmark('configs.index_build')
+def bench_index_build(ctx):
+    configs = saved_configs()
+    return measure(lambda: configindex.ConfigIndex(configs), ctx.iterations)
+
+
+#
+# One keystroke at a time, as the filter box sends them
+#
+@benchmark('configs.type_ahead')
+def bench_type_ahead(ctx):
+    index = configindex.ConfigIndex(saved_configs())
+    query = 'omaha user1'
+
+    def op():
+        for end in range(1, len(query) + 1):
+            index.view(query[:end], 'date')
+    return measure(op, ctx.iterations)
+
+
+@benchmark('configs.sort')
+def bench_sort(ctx):
+    configs = saved_configs()
+
+    def op():
+        index = configindex.ConfigIndex(configs)
+        for field in configindex.FIELDS:
+            index.view('', field)
+            index.view('', field, reverse=True)
+    return measure(op, ctx.iterations)
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+def start_server(args):
+    cmd = [sys.executable, os.path.join(HERE, 'fake_mvcm.py'), '--port', '0',
+           '--latency', str(args.latency), '--error-rate', str(args.error_rate),
+           '--zip-size', str(args.zip_size), '--log-lines', str(args.log_lines)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline().strip()
+    if not line.startswith('listening '):
+        proc.kill()
+        raise RuntimeError(f'stand-in server failed to start: {line!r}')
+    return proc, line.split(' ', 1)[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+#
+# Compares p50 latencies with an earlier run, returns the regressed names
+#
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {b['name']: b for b in json.load(f)['benchmarks']}
+    regressions = []
+    print(f"\n{'benchmark':45} {'baseline p50':>14} {'p50':>12} {'change':>8}")
+    for bench in results['benchmarks']:
+        old = baseline.get(bench['name'])
+        if not old or not old.get('p50') or not bench.get('p50'):
+            continue
+        change = bench['p50'] / old['p50'] - 1
+        flag = '  REGRESSION' if change > threshold else ''
+        print(f"{bench['name']:45} {old['p50'] * 1000:12.2f}ms {bench['p50'] * 1000:10.2f}ms {change:+8.1%}{flag}")
+        if change > threshold:
+            regressions.append(bench['name'])
+    return regressions
+
+
+#
+# Runs the benchmark `name` in a fresh process, so the peak RSS it reports
+# is its own and not the largest of every benchmark run before it
+#
+def run_isolated(name, host, workdir, args):
+    result_path = os.path.join(workdir, 'result.json')
+    cmd = [sys.executable, os.path.abspath(__file__), '--run-one', name, '--host', host,
+           '--workdir', workdir, '--result-file', result_path,
+           '--iterations', str(args.iterations), '--zip-size', str(args.zip_size)]
+    subprocess.run(cmd, check=True)
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def run_one(args):
+    ctx = BenchContext(args.host, args.workdir, args.iterations, args.zip_size)
+    try:
+        before = peak_rss()
+        result = dict(BENCHMARKS)[args.run_one](ctx)
+        after = peak_rss()
+    finally:
+        ctx.close()
+    result['peak_rss_bytes'] = after
+    result['rss_growth_bytes'] = after - before if before is not None and after is not None else None
+    with open(args.result_file, 'w') as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Mvcm / BusinessController against the stand-in server')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--filter', default='*', help='glob of benchmark names to run')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--zip-size', type=int, default=20 * 1024 * 1024)
+    parser.add_argument('--log-lines', type=int, default=20000)
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 slowdown counted as a regression')
+    # used by run_isolated for the process running one benchmark
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    parser.add_argument('--host', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return
+
+    proc, host = start_server(args)
+    workdir = tempfile.mkdtemp(prefix='mvcm_bench_')
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server': {'latency': args.latency, 'error_rate': args.error_rate,
+                   'zip_size': args.zip_size, 'log_lines': args.log_lines},
+        'benchmarks': [],
+    }
+    try:
+        for name, fn in BENCHMARKS:
+            if not fnmatch.fnmatch(name, args.filter):
+                continue
+            result = run_isolated(name, host, workdir, args)
+            result['name'] = name
+            results['benchmarks'].append(result)
+            rate = f"  {result['bytes_per_sec'] / 1024 / 1024:8.1f} MB/s" if result.get('bytes_per_sec') else ''
+            growth = result.get('rss_growth_bytes')
+            memory = f"  +{growth / 1024 / 1024:7.1f} MB RSS" if growth is not None else ''
+            print(f"{name:45} p50 {result['p50'] * 1000:8.2f}ms  p99 {result['p99'] * 1000:8.2f}ms  "
+                  f"{result['ops_per_sec']:8.1f} ops/s{rate}{memory}")
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nResults written to {args.output}')
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
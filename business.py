@@ -1,6 +1,29 @@
+import collections
+import configstore
+import configzip
+import fnmatch
 import mvcm
 import os
+import re
+import requests
 import tempfile
+import threading
+import time
+import workbookcache
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+# Default number of CCS create requests a bulk import keeps in flight
+DEFAULT_BULK_CONCURRENCY = 8
+
+# Default number of CCS servers verified at once
+DEFAULT_VERIFY_CONCURRENCY = 8
+
+# Default number of configurations a batch download pulls from one host at
+# once, and how often an interrupted one is resumed before it counts as failed
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+DEFAULT_DOWNLOAD_RETRIES = 3
 
 def printResponseError(response):
     # Print all details about the response
@@ -15,29 +38,235 @@ def printResponseError(response):
     print(f"Request Method: {response.request.method}")
     print(f"Request URL: {response.request.url}")
 
+def created(response):
+    # A create (sent with retry=True) went through if it succeeded, or if a
+    # retry found the entity already there: the attempt whose response was
+    # lost had made it
+    return response.ok or (getattr(response, 'attempts', 1) > 1 and response.status_code == HTTPStatus.CONFLICT)
+
+def format_update_timings(timings):
+    # Human readable breakdown of BusinessController.last_update_timings
+    lines = []
+    for leg in ('source', 'target'):
+        t = timings[leg]
+        lines.append(f"{leg.capitalize()} ({t['host']}): login {t['login']:.1f}s, "
+                     f"snapshot {t['delete'] + t['snapshot']:.1f}s, download {t['download']:.1f}s "
+                     f"= {t['total']:.1f}s")
+    lines.append(f"Merge {timings['merge']:.1f}s, upload {timings['upload']:.1f}s, total {timings['total']:.1f}s")
+    return '\n'.join(lines)
+
+def format_download_summary(summary):
+    # Human readable result of BusinessController.download_configurations
+    lines = [f"{summary['ok']} of {len(summary['files'])} configurations from {summary['host']}: "
+             f"{summary['bytes'] / 1024 / 1024:.1f} MB in {summary['seconds']:.1f}s "
+             f"({summary['bytes_per_sec'] / 1024 / 1024:.2f} MB/s)"]
+    for result in summary['files']:
+        if not result['ok']:
+            lines.append(f"{result['name']} failed: {result['error']}")
+        elif result['resumed_from']:
+            lines.append(f"{result['name']} resumed at {result['resumed_from']} bytes")
+    return '\n'.join(lines)
+
+def configuration_filename(config_name):
+    # Name a saved configuration can be written under on any file system
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', config_name).strip(' .') + '.zip'
+
 class BusinessController:
-    def __init__(self, mvcm_instance):
+    def __init__(self, mvcm_instance, sessions=None, archive=None):
         self.mvcm = mvcm_instance
+        self.sessions = sessions if sessions is not None else mvcm.SessionManager()
+        # Local content-addressed copy of every configuration downloaded
+        self.archive = archive if archive is not None else configstore.ConfigStore()
+        self.last_download = None
+        self.last_update_timings = None
+        # (hostname, limit) -> semaphore capping the downloads running against it
+        self.download_slots = {}
+        self.download_slots_lock = threading.Lock()
 
     def connect(self, hostname, username, password):
+        # Re-uses the logged-on session if we've been on this host before.
+        # If the logon fails this raises and self.mvcm stays on the old host.
         try:
-            self.mvcm.connect(hostname, username, password)
-        except Exception:
-            pass
+            connection = self.sessions.connect(hostname, username, password)
+        except SystemExit:
+            # Mvcm.logon exits on a refused logon
+            raise ConnectionError(f"Logon to {hostname} failed")
+        self.mvcm = connection
         
-    def get_saved_configurations(self):
-        r = self.mvcm.get("/saved-configurations", "application/json")
+    def get_saved_configurations(self, max_age=None):
+        r = self.mvcm.get("/saved-configurations", "application/json", cache=True, max_age=max_age)
         return r.json() if r.ok else []
     
-    def download_configuration(self, config_name, download_location):
-        r = self.mvcm.getzip('/saved-configurations/' + config_name, 'zip')
-        if r.status_code == 200:
-            with open(download_location, 'wb') as f:
-                f.write(r.content)
+    def configuration_dates(self):
+        # name -> date of every saved configuration, from the cached list
+        return {config['name']: config.get('date') for config in self.get_saved_configurations()}
+
+    def download_configuration(self, config_name, download_location, date=None):
+        result = self.mvcm.download('/saved-configurations/' + config_name, download_location)
+        self.last_download = result
+        if result['status_code'] == 200:
+            print(f"Downloaded {result['bytes']} bytes at {result['bytes_per_sec'] / 1024 / 1024:.2f} MB/s "
+                  f"(sha256 {result['sha256']})")
+            if date is None:
+                date = self.configuration_dates().get(config_name)
+            self.archive_configuration(download_location, self.mvcm.host, config_name, date)
             return True
         else:
             return False
 
+    def host_inventory(self, environment, hostname, username, password, max_age=None):
+        """
+        Logs on to one server (re-using its session if there is one) and
+        lists its saved configurations.
+
+        Returns:
+            dict: environment, host, ok, error, seconds and configs (the
+                  saved configurations, each with host and environment added)
+        """
+        start = time.perf_counter()
+        result = {'environment': environment, 'host': hostname, 'ok': False, 'error': None, 'configs': []}
+        try:
+            connection = self.sessions.connect(hostname, username, password)
+            r = connection.get("/saved-configurations", "application/json", cache=True, max_age=max_age)
+            if r.ok:
+                result['configs'] = [dict(config, host=hostname, environment=environment) for config in r.json()]
+                result['ok'] = True
+            else:
+                result['error'] = f"HTTP {r.status_code}"
+        except SystemExit:
+            # Mvcm.logon exits on a refused logon; here it only fails this host
+            result['error'] = "Logon failed"
+        except Exception as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    def configurations_matching(self, pattern):
+        """Names of the saved configurations matching a shell-style pattern (case-insensitive)"""
+        return [config['name'] for config in self.get_saved_configurations()
+                if fnmatch.fnmatch(config['name'].lower(), pattern.lower())]
+
+    def download_slot(self, hostname, max_per_host):
+        # Batches asking for the same limit share it; a different limit
+        # gets its own semaphore instead of the first caller's
+        key = (hostname, max_per_host)
+        with self.download_slots_lock:
+            if key not in self.download_slots:
+                self.download_slots[key] = threading.BoundedSemaphore(max_per_host)
+            return self.download_slots[key]
+
+    def download_configurations(self, config_names, dest_dir, max_per_host=DEFAULT_DOWNLOAD_CONCURRENCY,
+                                retries=DEFAULT_DOWNLOAD_RETRIES, progress=None):
+        """
+        Downloads several saved configurations from the current server in
+        parallel, each to dest_dir/<name>.zip, and archives them.
+
+        At most max_per_host downloads run against a host at once (across
+        every batch of this controller using the same limit).  A download
+        that breaks off is resumed from where it stopped, with a Range
+        request, up to retries times; progress(name, bytes, total) is called
+        as data arrives.  Any other error (e.g. a full disk) fails that file
+        only and deletes its partial download.
+
+        Returns:
+            dict: host, files (one result per name: name, path, ok, bytes,
+                  size, resumed_from, seconds, error), ok and failed counts,
+                  and the batch's bytes, seconds and bytes_per_sec
+        """
+        connection = self.mvcm
+        host = connection.host
+        slot = self.download_slot(host, max_per_host)
+        dates = self.configuration_dates()
+        os.makedirs(dest_dir, exist_ok=True)
+
+        def fetch(config_name):
+            path = os.path.join(dest_dir, configuration_filename(config_name))
+            result = {'name': config_name, 'path': path, 'ok': False, 'bytes': 0, 'size': 0,
+                      'resumed_from': 0, 'seconds': 0.0, 'error': None}
+            report = None
+            if progress is not None:
+                report = lambda done, total: progress(config_name, done, total)
+            with slot:
+                start = time.perf_counter()
+                try:
+                    for attempt in range(retries + 1):
+                        try:
+                            download = connection.download(f'/saved-configurations/{config_name}', path,
+                                                           progress=report, resume=True)
+                        except requests.exceptions.RequestException as e:
+                            result['error'] = str(e)
+                            if attempt < retries:
+                                delay = connection.policy.backoff(attempt)
+                                print(f"Download of {config_name} broke off ({type(e).__name__}), "
+                                      f"resuming in {delay:.1f}s")
+                                time.sleep(delay)
+                            continue
+                        result['bytes'] += download['bytes']
+                        if not download['ok']:
+                            result['error'] = f"HTTP {download['status_code']}"
+                            break
+                        if download['resumed_from']:
+                            result['resumed_from'] = download['resumed_from']
+                            # A file spliced from two different versions won't read back
+                            if not self.is_intact_zip(path):
+                                print(f"Resumed download of {config_name} is corrupt, downloading it again")
+                                download = connection.download(f'/saved-configurations/{config_name}', path,
+                                                               progress=report)
+                                result['bytes'] += download['bytes']
+                                result['resumed_from'] = 0
+                                if not download['ok']:
+                                    result['error'] = f"HTTP {download['status_code']}"
+                                    break
+                        result.update(ok=True, size=download['size'], error=None)
+                        break
+                except Exception as e:
+                    # e.g. a full disk: fail this file only, without leaving its .part behind
+                    result.update(ok=False, error=str(e))
+                    connection.discard_partial(path + '.part')
+                    print(f"Download of {config_name} failed: {str(e)}")
+                result['seconds'] = time.perf_counter() - start
+
+            if result['ok']:
+                self.archive_configuration(path, host, config_name, dates.get(config_name))
+            return result
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(len(config_names), max_per_host))) as executor:
+            files = list(executor.map(fetch, config_names))
+        seconds = time.perf_counter() - start
+
+        transferred = sum(result['bytes'] for result in files)
+        summary = {
+            'host': host,
+            'files': files,
+            'ok': sum(1 for result in files if result['ok']),
+            'failed': sum(1 for result in files if not result['ok']),
+            'bytes': transferred,
+            'seconds': seconds,
+            'bytes_per_sec': transferred / seconds if seconds > 0 else 0.0,
+        }
+        print(format_download_summary(summary))
+        return summary
+
+    @staticmethod
+    def is_intact_zip(path):
+        try:
+            with zipfile.ZipFile(path) as archive:
+                return archive.testzip() is None
+        except Exception:
+            return False
+
+    def archive_configuration(self, zip_path, host, config_name, date=None):
+        # Keeping a copy is a convenience; never let it fail the download
+        try:
+            snapshot = self.archive.add(zip_path, host, config_name, date)
+            print(f"Archived {config_name} from {host}: {snapshot['new_members']} of "
+                  f"{snapshot['members']} members new ({snapshot['new_bytes']} bytes)")
+            return snapshot
+        except Exception as e:
+            print(f"Could not archive {config_name}: {str(e)}")
+            return None
+
     def restore_configuration(self, config_name):
         response = self.mvcm.post(f'/saved-configurations/{config_name}/operations/restore', None)
         if not response.ok:
@@ -54,67 +283,126 @@ class BusinessController:
         response = self.mvcm.post('/saved-configurations/' + name, data)
         return response.ok
 
+    def diff_configurations(self, old_name, new_name, old_connection=None, new_connection=None):
+        """
+        Compares two saved configurations, by default both on the current
+        server; pass the Mvcm of another server to compare across hosts.
+
+        Returns:
+            dict: configzip.diff_archives result (added, removed, changed, unchanged)
+        """
+        old_connection = old_connection or self.mvcm
+        new_connection = new_connection or self.mvcm
+
+        # Stream both archives to disk (at the same time) and diff the files,
+        # so neither is ever held in memory whole
+        with tempfile.TemporaryDirectory() as diff_dir:
+            old_zip = os.path.join(diff_dir, 'old.zip')
+            new_zip = os.path.join(diff_dir, 'new.zip')
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                old_leg = executor.submit(old_connection.download, f'/saved-configurations/{old_name}', old_zip)
+                new_leg = executor.submit(new_connection.download, f'/saved-configurations/{new_name}', new_zip)
+                for name, leg in ((old_name, old_leg), (new_name, new_leg)):
+                    download = leg.result()
+                    if not download['ok']:
+                        raise RuntimeError(f"Could not download {name}: HTTP {download['status_code']}")
+            result = configzip.diff_archives(old_zip, new_zip)
+        print(configzip.format_diff(result))
+        return result
+
+    def snapshot_configuration(self, hostname, username, password, config_name, description, zip_path):
+        """
+        One leg of an update: log on to hostname, replace config_name with a
+        fresh snapshot and download it to zip_path.
+
+        Returns:
+            dict: host, connection, bytes downloaded and the
+                  login/delete/snapshot/download/total times in seconds
+        """
+        timings = {'host': hostname}
+        start = time.perf_counter()
+
+        # Get (or log on to) the MVCM session for the server
+        connection = self.sessions.connect(hostname, username, password)
+        timings['login'] = time.perf_counter() - start
+
+        # Try to delete an existing configuration of that name
+        t = time.perf_counter()
+        try:
+            connection.delete(f'/saved-configurations/{config_name}')
+        except Exception:
+            pass
+        timings['delete'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        response = connection.post(f'/saved-configurations/{config_name}',
+                                   {"name": config_name, "description": description})
+        timings['snapshot'] = time.perf_counter() - t
+        if not response.ok:
+            raise RuntimeError(f"Could not create {config_name} on {hostname}: HTTP {response.status_code}")
+
+        # Stream the configuration into the temporary directory
+        t = time.perf_counter()
+        result = connection.download(f'/saved-configurations/{config_name}', zip_path)
+        timings['download'] = time.perf_counter() - t
+        if not result['ok']:
+            raise RuntimeError(f"Could not download {config_name} from {hostname}: HTTP {result['status_code']}")
+
+        timings['bytes'] = result['bytes']
+        self.archive_configuration(zip_path, hostname, config_name, self.created_date(response))
+        timings['total'] = time.perf_counter() - start
+        timings['connection'] = connection
+        return timings
+
+    @staticmethod
+    def created_date(response):
+        # The server's date for a configuration it has just created, if the
+        # create response carries one
+        try:
+            return response.json().get('date')
+        except (ValueError, AttributeError):
+            return None
+
     def update_configuration(self, source_hostname, target_hostname, username, password):
+        self.last_update_timings = None
         try:
+            start = time.perf_counter()
+
             # Create a temporary directory for the merge process
             with tempfile.TemporaryDirectory() as merge_base_dir:
-                # Create subdirectories for extraction and merging
-                source_extract_dir = os.path.join(merge_base_dir, "sourceExtracted")
-                target_extract_dir = os.path.join(merge_base_dir, "targetExtracted")
-                merge_file_dir = os.path.join(merge_base_dir, "mergeFile")
-                
-                os.makedirs(source_extract_dir, exist_ok=True)
-                os.makedirs(target_extract_dir, exist_ok=True)
-                os.makedirs(merge_file_dir, exist_ok=True)
-                
-                # Create MVCM connections
-                source_connection = mvcm.Mvcm()
-                target_connection = mvcm.Mvcm()
-                source_connection.connect(source_hostname, username, password)
-                target_connection.connect(target_hostname, username, password)
-                
-                # Try to delete existing configurations on servers
-                try:
-                    source_connection.delete('/saved-configurations/source_Merge')
-                except Exception:
-                    pass
-                    
-                try:
-                    target_connection.delete('/saved-configurations/target_Merge')
-                except Exception:
-                    pass
-                
-                # Create new configurations
-                source_data = {"name": 'source_Merge', "description": 'Newly created source config to be merged'}
-                target_data = {"name": 'target_Merge', "description": 'Newly created target config to be merged'}
-                
-                source_connection.post('/saved-configurations/source_Merge', source_data)
-                target_connection.post('/saved-configurations/target_Merge', target_data)
-
-                # Download configurations
-                source_response = source_connection.getzip('/saved-configurations/source_Merge', 'zip')
-                target_response = target_connection.getzip('/saved-configurations/target_Merge', 'zip')
-                
-                # Save downloaded zip files in the temporary directory
                 source_zip = os.path.join(merge_base_dir, "source_Merge.zip")
                 target_zip = os.path.join(merge_base_dir, "target_Merge.zip")
-                
-                with open(source_zip, 'wb') as f:
-                    f.write(source_response.content)
-                with open(target_zip, 'wb') as f:
-                    f.write(target_response.content)
+
+                # The two servers don't depend on each other until the merge,
+                # so snapshot and download both at the same time
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    source_leg = executor.submit(self.snapshot_configuration, source_hostname, username, password,
+                                                 'source_Merge', 'Newly created source config to be merged', source_zip)
+                    target_leg = executor.submit(self.snapshot_configuration, target_hostname, username, password,
+                                                 'target_Merge', 'Newly created target config to be merged', target_zip)
+                    source_timings = source_leg.result()
+                    target_timings = target_leg.result()
+                source_connection = source_timings.pop('connection')
+                target_connection = target_timings.pop('connection')
+                timings = {'source': source_timings, 'target': target_timings}
                     
-                # Merge configurations using the temporary directories
+                # Merge the two downloads zip to zip inside the temporary directory
+                t = time.perf_counter()
                 merged_zip_path = source_connection.merge_configurations(
-                    username, source_hostname, target_hostname,
-                    merge_base_dir, source_extract_dir, target_extract_dir, merge_file_dir
+                    username, source_hostname, target_hostname, merge_base_dir
                 )
+                timings['merge'] = time.perf_counter() - t
                 
                 # Upload merged configuration if the merged zip file exists
                 success = False
+                t = time.perf_counter()
                 if os.path.exists(merged_zip_path):
                     response = target_connection.postbinary('/saved-configurations', merged_zip_path)
                     success = response.ok
+                timings['upload'] = time.perf_counter() - t
+                timings['total'] = time.perf_counter() - start
+                self.last_update_timings = timings
+                print(format_update_timings(timings))
                     
                 # Temporary files and directories are automatically removed here
                 return success
@@ -126,15 +414,34 @@ class BusinessController:
 # -------------------------------
 # Excel Parser
 # -------------------------------
+import datetime
 import pandas as pd
 from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+import xml.etree.ElementTree as ET
 import numpy as np
 
+# Rows handed to the preview / import at a time by the streaming reader
+EXCEL_BATCH_SIZE = 1000
+
+# Cell types that go into a JSON payload as they are
+JSON_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Sheet columns that are for reference (or only go into the URL) and are
+# left out of the create payloads
+CCS_SERVER_EXCLUDED_COLUMNS = ('Chip', 'Port', 'Location')
+CCS_SESSION_EXCLUDED_COLUMNS = ('DR?', 'LPAR', 'CU Address')
+
 class ExcelParser:
-    def __init__(self):
+    def __init__(self, cache=None):
+        # Cleaned sheets of workbooks opened before, see workbookcache
+        self.cache = cache if cache is not None else workbookcache.WorkbookCache()
         self.current_data = None
         self.current_headers = None
         self.current_file = None
+        self.current_sheet = None
+        self.current_columns = None
+        self.current_scan = None
     
     def read_excel(self, file_path, sheet_name=0):
         """
@@ -170,6 +477,236 @@ class ExcelParser:
             print(f"Error reading Excel file: {str(e)}")
             raise
     
+    def stream_excel(self, file_path, sheet_name=0, columns=None):
+        """
+        Reads an Excel file row by row (openpyxl read-only mode) instead of
+        loading it into a DataFrame.  Rows are cleaned like read_excel does:
+        the first row is the header, completely empty rows and columns are
+        dropped, empty cells become '' and header names are made unique.
+        Unlike pandas, whole numbers stay ints even in columns with blanks.
+
+        The sheet is read twice: once up front (a quick pass over the sheet
+        XML) to find the header and the empty columns, then lazily as the
+        returned rows are consumed, so memory use doesn't grow with the
+        workbook.  The cleaned rows are written to the workbook cache on the
+        way, and an unchanged workbook is read back from there instead.
+
+        Args:
+            file_path (str): Path to the Excel file
+            sheet_name (str or int): Sheet name or index to read (default is first sheet)
+            columns (list): Only return these columns, in this order (default all)
+
+        Returns:
+            tuple: (headers, rows) where rows is a generator of tuples
+        """
+        cached = self._open_cached_sheet(file_path, sheet_name)
+        if cached is not None:
+            headers, rows = cached
+        else:
+            headers, rows = self._read_sheet(file_path, sheet_name)
+            if self.cache is not None:
+                rows = self.cache.record(file_path, sheet_name, headers, rows, EXCEL_BATCH_SIZE)
+
+        if columns is not None:
+            missing = [c for c in columns if c not in headers]
+            if missing:
+                rows.close()
+                raise KeyError(f"Columns not in sheet: {', '.join(missing)}")
+            picked = [headers.index(c) for c in columns]
+            rows = (tuple(row[i] for i in picked) for row in rows)
+            headers = list(columns)
+
+        self.current_file = file_path
+        self.current_sheet = sheet_name
+        self.current_columns = columns
+        self.current_data = None
+        self.current_headers = headers
+        return headers, rows
+
+    def _open_cached_sheet(self, file_path, sheet_name):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.open_sheet(file_path, sheet_name)
+        except Exception as e:
+            # A broken cache only costs a re-read of the workbook
+            print(f"Workbook cache unavailable: {str(e)}")
+            return None
+
+    def _read_sheet(self, file_path, sheet_name):
+        """Returns the cleaned headers and a generator of cleaned rows read with openpyxl"""
+        # The scan is reused while the file is unchanged (e.g. import after preview)
+        stat = os.stat(file_path)
+        scan_key = (os.path.abspath(file_path), sheet_name, stat.st_size, stat.st_mtime_ns)
+        workbook, sheet = self._open_sheet(file_path, sheet_name)
+        try:
+            if self.current_scan is None or self.current_scan[0] != scan_key:
+                self.current_scan = (scan_key, self._scan_sheet(file_path, sheet))
+            headers, keep = self.current_scan[1]
+        except Exception:
+            workbook.close()
+            raise
+        return headers, self._iter_sheet_rows(workbook, sheet, keep)
+
+    def _open_sheet(self, file_path, sheet_name):
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        # Some writers store a wrong <dimension>; make openpyxl read every cell
+        sheet.reset_dimensions()
+        return workbook, sheet
+
+    def _scan_sheet(self, file_path, sheet):
+        """Returns the cleaned header names and the sheet indexes of the non-empty columns"""
+        header_row = list(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+        try:
+            has_data = self._scan_sheet_xml(file_path, sheet._worksheet_path)
+        except (AttributeError, KeyError, ET.ParseError):
+            has_data = self._scan_sheet_cells(sheet)
+
+        width = max(len(header_row), len(has_data))
+        header_row += [None] * (width - len(header_row))
+        has_data += [False] * (width - len(has_data))
+        names = [f"Unnamed: {i}" if col is None else str(col) for i, col in enumerate(header_row)]
+        names = self._unique_headers(names)
+
+        keep = [i for i in range(width) if has_data[i]]
+        return [names[i] for i in keep], keep
+
+    @staticmethod
+    def _scan_sheet_xml(file_path, worksheet_path):
+        """
+        Which columns have a value below the header row, read from the sheet
+        XML directly: only the presence of a value matters here, so this
+        skips openpyxl converting every cell and takes a fraction of the time.
+        """
+        def local(tag):
+            return tag.rsplit('}', 1)[-1]
+
+        has_data = []
+        row_number = 0
+        with zipfile.ZipFile(file_path) as archive, archive.open(worksheet_path) as f:
+            for _, element in ET.iterparse(f):
+                if local(element.tag) != 'row':
+                    continue
+                ref = element.get('r')
+                row_number = int(ref) if ref else row_number + 1
+                if row_number >= 2:
+                    column = -1
+                    for cell in element:
+                        if local(cell.tag) != 'c':
+                            continue
+                        ref = cell.get('r')
+                        column = column_index_from_string(ref.rstrip('0123456789')) - 1 if ref else column + 1
+                        if any(local(child.tag) in ('v', 'is') for child in cell):
+                            if column >= len(has_data):
+                                has_data.extend([False] * (column + 1 - len(has_data)))
+                            has_data[column] = True
+                element.clear()
+        return has_data
+
+    @staticmethod
+    def _scan_sheet_cells(sheet):
+        """Which columns have a value below the header row, read through openpyxl"""
+        has_data = []
+        for values in sheet.iter_rows(min_row=2, values_only=True):
+            if len(values) > len(has_data):
+                has_data.extend([False] * (len(values) - len(has_data)))
+            for i, value in enumerate(values):
+                if value is not None:
+                    has_data[i] = True
+        return has_data
+
+    @staticmethod
+    def _unique_headers(names):
+        """Renames repeated headers to name.1, name.2 ... skipping names already in use"""
+        taken = set(names)
+        seen = set()
+        unique = []
+        for name in names:
+            if name in seen:
+                n = 0
+                while f"{name}.{n}" in taken or n == 0:
+                    n += 1
+                name = f"{name}.{n}"
+                taken.add(name)
+            seen.add(name)
+            unique.append(name)
+        return unique
+
+    def _iter_sheet_rows(self, workbook, sheet, keep):
+        try:
+            rows = sheet.iter_rows(min_row=2, values_only=True)
+            for values in rows:
+                picked = [values[i] if i < len(values) else None for i in keep]
+                if all(value is None for value in picked):
+                    continue
+                yield tuple('' if value is None else value for value in picked)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def iter_batches(rows, batch_size=EXCEL_BATCH_SIZE):
+        """Groups an iterable of rows into lists of up to batch_size"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_json_data(self, batch_size=EXCEL_BATCH_SIZE, exclude=()):
+        """
+        Yields the current data as lists of up to batch_size JSON-serializable
+        dictionaries, leaving out the `exclude` columns.  After stream_excel
+        the file is read again as the batches are consumed, so only one batch
+        is held at a time; after read_excel the DataFrame rows go through the
+        same json_batches conversion.
+        """
+        if self.current_data is not None:
+            headers, rows = list(self.current_data.columns), self.current_data.itertuples(index=False, name=None)
+        elif self.current_file is not None:
+            headers, rows = self.stream_excel(self.current_file, self.current_sheet, self.current_columns)
+        else:
+            return
+        yield from self.json_batches(headers, rows, batch_size, exclude)
+
+    @staticmethod
+    def json_batches(headers, rows, batch_size=EXCEL_BATCH_SIZE, exclude=()):
+        """
+        Turns rows (tuples in headers order, as stream_excel yields them) into
+        lists of up to batch_size dictionaries, leaving out the `exclude`
+        columns.  Each batch is cast column by column: a column that holds
+        only native JSON types is passed through untouched, any other column
+        (dates, numpy scalars) is converted value by value with _json_value.
+        """
+        keep = [i for i, header in enumerate(headers) if header not in exclude]
+        kept_headers = [headers[i] for i in keep]
+        for batch in ExcelParser.iter_batches(rows, batch_size):
+            columns = list(zip(*batch))
+            columns = [ExcelParser._json_column(columns[i]) for i in keep]
+            yield [dict(zip(kept_headers, row)) for row in zip(*columns)]
+
+    @staticmethod
+    def _json_column(column):
+        if JSON_TYPES.issuperset(map(type, column)):
+            return column
+        return [ExcelParser._json_value(value) for value in column]
+
+    @staticmethod
+    def _json_value(value):
+        if isinstance(value, np.integer):
+            return int(value)
+        elif isinstance(value, np.floating):
+            return float(value)
+        elif isinstance(value, np.ndarray):
+            return value.tolist()
+        elif isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            # pd.Timestamp is a datetime subclass
+            return value.isoformat()
+        return value
+
     def _clean_dataframe(self, df):
         """
         Clean up the dataframe by:
@@ -205,33 +742,27 @@ class ExcelParser:
         Returns a list of sheet names in the Excel file
         """
         try:
+            if self.cache is not None:
+                sheet_names = self.cache.get_sheet_names(file_path)
+                if sheet_names is not None:
+                    return sheet_names
             workbook = load_workbook(file_path, read_only=True)
-            return workbook.sheetnames
+            sheet_names = workbook.sheetnames
+            workbook.close()
+            if self.cache is not None:
+                self.cache.store_sheet_names(file_path, sheet_names)
+            return sheet_names
         except Exception as e:
             print(f"Error getting sheet names: {str(e)}")
             raise
     
-    def get_json_data(self):
+    def get_json_data(self, exclude=()):
         """
         Returns the current data as a JSON-serializable list of dictionaries
         """
-        if self.current_data is None:
+        if self.current_data is None and self.current_file is None:
             return None
-        
-        # Convert DataFrame to list of dicts, handling non-serializable objects like numpy numbers
-        records = self.current_data.to_dict('records')
-        
-        # Ensure all values are JSON-serializable and exclude specific keys
-        for record in records:          
-            for key, value in record.items():
-                if isinstance(value, np.integer):
-                    record[key] = int(value)
-                elif isinstance(value, np.floating):
-                    record[key] = float(value)
-                elif isinstance(value, np.ndarray):
-                    record[key] = value.tolist()
-        
-        return records
+        return [record for batch in self.iter_json_data(exclude=exclude) for record in batch]
     
     def extract_names(self, json_list):
         """
@@ -292,11 +823,13 @@ class ExcelParser:
                 # Construct the URL with the 'name' value
                 url = f'/ccs/servers/{name}'
                 
-                # Pass the modified JSON object into the post function
-                response = mvcm_inst.post(url, json_obj)
+                # Pass the modified JSON object into the post function.  The
+                # server name is in the URL, so a retried create can't make
+                # a second server; at worst it finds the first one there
+                response = mvcm_inst.post(url, json_obj, retry=True)
                 print(printResponseError(response))
                 # Check if the response is OK
-                if not response.ok:
+                if not created(response):
                     print(f"Failed to create CCS server for {name}")
                     return False
             else:
@@ -305,6 +838,125 @@ class ExcelParser:
         
         return True
     
+    def create_ccs_servers_bulk(self, mvcm_inst, json_list, max_workers=DEFAULT_BULK_CONCURRENCY):
+        """
+        Creates a CCS server for every JSON object, running up to max_workers
+        POSTs at once and carrying on past failures.
+
+        Args:
+            mvcm_inst (Mvcm): Logged-on connection to post to
+            json_list (iterable): Row payloads, e.g. from
+                                  iter_json_data(exclude=CCS_SERVER_EXCLUDED_COLUMNS);
+                                  consumed lazily and sent as given apart from 'name'
+            max_workers (int): Concurrency limit (keep it <= the Mvcm pool size)
+
+        Returns:
+            list: One dict per row, in row order, with row, name, ok, status,
+                  latency (seconds) and error (response body or exception text)
+        """
+        def create(row, json_obj):
+            body = dict(json_obj)
+            name = body.pop('name', None)
+            result = {'row': row, 'name': name, 'ok': False, 'status': None,
+                      'latency': 0.0, 'error': None}
+            if name is None:
+                result['error'] = "No 'name' key found in JSON object"
+                return result
+
+            start = time.perf_counter()
+            try:
+                response = mvcm_inst.post(f'/ccs/servers/{name}', body, retry=True)
+                result['status'] = response.status_code
+                result['ok'] = created(response)
+                if not result['ok']:
+                    result['error'] = response.text
+            except Exception as e:
+                result['error'] = str(e)
+            result['latency'] = time.perf_counter() - start
+            return result
+
+        # Submit as the payloads arrive, keeping a bounded number queued, so a
+        # generator (e.g. from iter_json_data) is never read ahead in full
+        max_workers = max(1, max_workers)
+        results = []
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for row, json_obj in enumerate(json_list):
+                pending.append(executor.submit(create, row, json_obj))
+                while len(pending) > 2 * max_workers:
+                    results.append(pending.popleft().result())
+            while pending:
+                results.append(pending.popleft().result())
+
+        failed = [r for r in results if not r['ok']]
+        print(f"Created {len(results) - len(failed)} of {len(results)} CCS servers")
+        for r in failed:
+            print(f"Failed to create CCS server for {r['name']} (row {r['row'] + 1}): {r['status']} {r['error']}")
+        return results
+
+    def verify_ccs_server(self, mvcm_inst, server_name):
+        """
+        Starts a CCS server and checks its log: the server is considered up
+        unless the third-to-last log line contains "Error exit".
+        Safe to call from worker threads.
+
+        Returns:
+            dict: name, success, error, error_code and latency (seconds)
+        """
+        start = time.perf_counter()
+        result = {'name': server_name, 'success': False, 'error': True,
+                  'error_code': 'fail', 'latency': 0.0}
+        try:
+            # Send POST request to start the server
+            mvcm_inst.post(f"/api/ccs/servers/{server_name}/operations/start")
+
+            # Only the end of the log is needed, not the whole file
+            lines = mvcm_inst.getlog_tail(server_name, 3)
+
+            # Check the third-to-last line for "Error exit"
+            if len(lines) >= 3:
+                if "Error exit" in lines[-3]:
+                    print(f"{server_name}: the third-to-last line contains 'Error exit'.")
+                else:
+                    result['success'] = True
+                    result['error'] = False
+            else:
+                print(f"{server_name}: the log does not have enough lines.")
+        except Exception as e:
+            result['error_code'] = str(e)
+        result['latency'] = time.perf_counter() - start
+        return result
+
+    def verify_ccs_servers(self, mvcm_inst, server_names, max_workers=DEFAULT_VERIFY_CONCURRENCY,
+                           on_result=None, stop=None):
+        """
+        Verifies every server (see verify_ccs_server) on a pool of its own,
+        max_workers at a time, so a long verification never holds up other
+        work sharing a thread pool with the caller.
+
+        Args:
+            mvcm_inst (Mvcm): Logged-on connection to the servers' host
+            server_names (list): Servers to start and check
+            max_workers (int): Concurrency limit (keep it <= the Mvcm pool size)
+            on_result (callable): Called with each result as it arrives, on a
+                                  worker thread
+            stop (threading.Event): Once set, checks that haven't started are skipped
+
+        Returns:
+            list: The results of the checks that ran, in server_names order
+        """
+        def check(server_name):
+            if stop is not None and stop.is_set():
+                return None
+            result = self.verify_ccs_server(mvcm_inst, server_name)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(check, server_names))
+        return [result for result in results if result is not None]
+
     def create_ccs_console(self, mvcm_inst, json_list):
         """
         Iterates through each JSON object, extracts the 'name' value, attaches it to the URL,
@@ -323,9 +975,10 @@ class ExcelParser:
                 url = f'/ccs/servers/{serverName}/sessions/{sessionName}'
                 
                 # Pass the modified JSON object into the post function
-                response = mvcm_inst.post(url, json_obj)
+                # (named in the URL, so safe to retry)
+                response = mvcm_inst.post(url, json_obj, retry=True)
                 # Check if the response is OK
-                if not response.ok:
+                if not created(response):
                     print(f"Failed to create CCS session {sessionName} for {serverName}")
                     return False
             else:
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+
+from datetime import datetime
+
+#
+# In-memory index over a /saved-configurations list, for filtering and
+# sorting it as the user types without asking the server again.  Every
+# entry's searchable text is lowercased once when the index is built, and
+# the order of each sortable field is computed once on first use, so a
+# keystroke is a substring scan over the entries still in play and a
+# re-sort is a pass over a precomputed order.
+#
+# A query is a list of words that must all appear; `field:word` (e.g.
+# `user:jdoe`) looks in that field only.
+#
+
+FIELDS = ('name', 'description', 'user', 'date')
+
+# Date layouts tried, after ISO 8601, when sorting by date; anything else
+# sorts as text after the dates that parsed
+DATE_FORMATS = ('%m/%d/%Y %H:%M:%S', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y')
+
+
+def date_key(value):
+    text = str(value).strip()
+    try:
+        return (0, datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None), '')
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return (0, datetime.strptime(text, date_format), '')
+        except ValueError:
+            pass
+    return (1, datetime.min, text.lower())
+
+
+def parse_query(query):
+    """Splits a query into (field or None, lowercased word) terms"""
+    terms = []
+    for word in query.lower().split():
+        field, sep, rest = word.partition(':')
+        if sep and field in FIELDS and rest:
+            terms.append((field, rest))
+        else:
+            terms.append((None, word))
+    return terms
+
+
+class ConfigIndex:
+
+    def __init__(self, configs):
+        self.configs = list(configs)
+        # Per field, the lowercased text of every entry, plus all of them
+        # joined for unqualified words
+        self.text = {field: [str(c.get(field, '') or '').lower() for c in self.configs] for field in FIELDS}
+        self.text[None] = ['\n'.join(values) for values in zip(*(self.text[f] for f in FIELDS))] \
+            if self.configs else []
+        self.orders = {}
+        self.last_query = None
+        self.last_matches = None
+
+    def __len__(self):
+        return len(self.configs)
+
+    def order(self, field, reverse=False):
+        """Positions of the entries sorted by field (ties keep list order)"""
+        if field not in self.orders:
+            if field == 'date':
+                keys = [date_key(c.get('date', '')) for c in self.configs]
+            else:
+                keys = self.text[field]
+            self.orders[field] = sorted(range(len(self.configs)), key=keys.__getitem__)
+        ascending = self.orders[field]
+        return ascending[::-1] if reverse else ascending
+
+    def matches(self, query):
+        """Positions (in list order) of the entries matching query"""
+        terms = parse_query(query)
+        if not terms:
+            return list(range(len(self.configs)))
+
+        # Typing one more character only narrows the last result
+        if self.last_query is not None and self.narrows(self.last_query, terms):
+            candidates = self.last_matches
+        else:
+            candidates = range(len(self.configs))
+
+        for field, word in terms:
+            text = self.text[field]
+            candidates = [i for i in candidates if word in text[i]]
+        self.last_query = terms
+        self.last_matches = candidates
+        return candidates
+
+    @staticmethod
+    def narrows(previous, terms):
+        # Every entry matching terms also matches previous when each
+        # previous term is contained in the term at the same place
+        if len(terms) < len(previous):
+            return False
+        return all(field == old_field and old_word in word
+                   for (old_field, old_word), (field, word) in zip(previous, terms))
+
+    def view(self, query='', sort_field=None, reverse=False):
+        """The configs matching query, sorted by sort_field if given"""
+        matched = self.matches(query)
+        if sort_field is None:
+            positions = matched[::-1] if reverse else matched
+        elif len(matched) == len(self.configs):
+            positions = self.order(sort_field, reverse)
+        else:
+            keep = set(matched)
+            positions = [i for i in self.order(sort_field, reverse) if i in keep]
+        return [self.configs[i] for i in positions]
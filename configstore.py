@@ -0,0 +1,302 @@
+#!/usr/bin/python
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime
+
+import configzip
+
+#
+# Local archive of downloaded saved configurations.  Every member of a
+# configuration zip is stored once, under the sha256 of its compressed
+# bytes, so snapshots of near-identical configurations only add the
+# members that changed.  Each snapshot has a manifest listing its members
+# and the zip metadata needed to put the archive back together byte for
+# byte, and is indexed by host, configuration name and date:
+#
+#     <root>/index.json                 one entry per snapshot
+#     <root>/manifests/<id>.json        the members of a snapshot
+#     <root>/objects/ab/cdef...         member data, as stored in the zip
+#
+# Old snapshots are evicted by age and, oldest first, until the objects
+# fit in max_bytes; objects no snapshot refers to any more are deleted.
+#
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.bmc_api_app', 'configurations')
+
+# Disk the member objects may use before the oldest snapshots are evicted
+DEFAULT_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Snapshots older than this (in seconds) are evicted
+DEFAULT_STORE_MAX_AGE = 90 * 24 * 60 * 60
+
+# ZipInfo attributes kept in a manifest for every member
+MEMBER_FIELDS = ('date_time', 'compress_type', 'comment', 'extra', 'create_system', 'create_version',
+                 'extract_version', 'flag_bits', 'volume', 'internal_attr', 'external_attr',
+                 'CRC', 'compress_size', 'file_size')
+
+_BYTES_FIELDS = ('comment', 'extra')
+
+
+class ConfigStore:
+
+    def __init__(self, root=DEFAULT_STORE_DIR, max_bytes=DEFAULT_STORE_MAX_BYTES, max_age=DEFAULT_STORE_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        # object hash -> number of adds in progress relying on it; eviction
+        # leaves these on disk even when no snapshot refers to them yet
+        self.pins = collections.Counter()
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+        self.index = self.read_json(os.path.join(root, 'index.json'), [])
+
+        # object hash -> number of snapshots using it, and its size on disk
+        self.refcounts = collections.Counter()
+        self.object_sizes = {}
+        for snapshot in self.index:
+            for member in self.manifest(snapshot['id'])['members']:
+                self.refcounts[member['object']] += 1
+                self.object_sizes[member['object']] = member['compress_size']
+
+    #
+    # Reads a JSON file, returning default if it doesn't exist
+    #
+    @staticmethod
+    def read_json(path, default):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    #
+    # Writes a JSON file so that readers never see it half written
+    #
+    @staticmethod
+    def write_json(path, data):
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        with open(part_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(part_path, path)
+
+    def save_index(self):
+        self.write_json(os.path.join(self.root, 'index.json'), self.index)
+
+    def manifest(self, snapshot_id):
+        return self.read_json(os.path.join(self.manifests_dir, f'{snapshot_id}.json'), {'members': []})
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    #
+    # Stores one member of an open zip unless an identical one is already
+    # there, and pins the object until the caller unpins it.  Returns
+    # (object hash, True if it had to be written).  Runs without the store
+    # lock: objects are only ever renamed into place whole.
+    #
+    def store_member(self, archive, info):
+        digest = hashlib.sha256()
+        for chunk in configzip.read_raw_member(archive, info):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        path = self.object_path(digest)
+        with self.lock:
+            self.pins[digest] += 1
+            if os.path.exists(path):
+                return digest, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        try:
+            with open(part_path, 'wb') as f:
+                for chunk in configzip.read_raw_member(archive, info):
+                    f.write(chunk)
+            os.replace(part_path, path)
+        except Exception:
+            self.unpin([digest])
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return digest, True
+
+    def unpin(self, digests):
+        with self.lock:
+            for digest in digests:
+                self.pins[digest] -= 1
+                if self.pins[digest] <= 0:
+                    del self.pins[digest]
+
+    #
+    # Archives a downloaded configuration zip as a snapshot of config_name
+    # on host.  date is the configuration's date as the server lists it
+    # (defaults to now).  Returns the snapshot's index entry, which also
+    # says how many members were new and how many bytes that cost.
+    #
+    def add(self, zip_path, host, config_name, date=None):
+        members = []
+        new_members = 0
+        new_bytes = 0
+        # Hashing and writing the members runs unlocked, so several
+        # downloads can be archived at once; the objects stay pinned until
+        # the snapshot refers to them, so an eviction meanwhile can't delete
+        # one this snapshot found already stored
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as archive:
+                for info in archive.infolist():
+                    digest, written = self.store_member(archive, info)
+                    member = {'name': info.filename, 'object': digest}
+                    members.append(member)
+                    if written:
+                        new_members += 1
+                        new_bytes += info.compress_size
+                    for field in MEMBER_FIELDS:
+                        value = getattr(info, field)
+                        member[field] = value.hex() if field in _BYTES_FIELDS else value
+                comment = archive.comment
+
+            snapshot = {
+                'id': uuid.uuid4().hex,
+                'host': host,
+                'name': config_name,
+                'date': date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'stored_at': time.time(),
+                'size': os.path.getsize(zip_path),
+                'members': len(members),
+                'new_members': new_members,
+                'new_bytes': new_bytes,
+            }
+            self.write_json(os.path.join(self.manifests_dir, f"{snapshot['id']}.json"),
+                            {'comment': comment.hex(), 'members': members})
+
+            with self.lock:
+                for member in members:
+                    self.refcounts[member['object']] += 1
+                    self.object_sizes[member['object']] = member['compress_size']
+                self.index.append(snapshot)
+                self.evict(keep=snapshot['id'])
+                self.save_index()
+        finally:
+            self.unpin([member['object'] for member in members])
+        return snapshot
+
+    #
+    # Snapshots matching host / config name / date (any of them may be
+    # None), newest first
+    #
+    def snapshots(self, host=None, config_name=None, date=None):
+        with self.lock:
+            found = [s for s in self.index
+                     if (host is None or s['host'] == host)
+                     and (config_name is None or s['name'] == config_name)
+                     and (date is None or s['date'] == date)]
+        return sorted(found, key=lambda s: s['stored_at'], reverse=True)
+
+    #
+    # The newest snapshot of config_name on host (with the given date, if
+    # any), or None
+    #
+    def find(self, host, config_name, date=None):
+        found = self.snapshots(host, config_name, date)
+        return found[0] if found else None
+
+    #
+    # Writes the zip of a snapshot (an index entry or its id) to dest_path
+    #
+    def extract(self, snapshot, dest_path):
+        snapshot_id = snapshot['id'] if isinstance(snapshot, dict) else snapshot
+        manifest = self.manifest(snapshot_id)
+        if not manifest['members']:
+            raise KeyError(f'No snapshot {snapshot_id} in {self.root}')
+
+        part_path = f'{dest_path}.part'
+        try:
+            with zipfile.ZipFile(part_path, 'w') as archive:
+                for member in manifest['members']:
+                    info = zipfile.ZipInfo(member['name'], tuple(member['date_time']))
+                    for field in MEMBER_FIELDS[1:]:
+                        value = member[field]
+                        setattr(info, field, bytes.fromhex(value) if field in _BYTES_FIELDS else value)
+                    with open(self.object_path(member['object']), 'rb') as f:
+                        configzip.write_raw_member(archive, info,
+                                                   iter(lambda: f.read(configzip.COPY_CHUNK_SIZE), b''))
+                archive.comment = bytes.fromhex(manifest.get('comment', ''))
+            os.replace(part_path, dest_path)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return dest_path
+
+    #
+    # Drops a snapshot and deletes the objects only it used
+    #
+    def remove(self, snapshot_id):
+        with self.lock:
+            self.index = [s for s in self.index if s['id'] != snapshot_id]
+            manifest_path = os.path.join(self.manifests_dir, f'{snapshot_id}.json')
+            for member in self.manifest(snapshot_id)['members']:
+                digest = member['object']
+                self.refcounts[digest] -= 1
+                if self.refcounts[digest] <= 0:
+                    del self.refcounts[digest]
+                    self.object_sizes.pop(digest, None)
+                    if self.pins[digest]:
+                        # an add in progress is about to refer to it
+                        continue
+                    try:
+                        os.remove(self.object_path(digest))
+                    except FileNotFoundError:
+                        pass
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+
+    #
+    # Evicts snapshots older than max_age, then the oldest ones until the
+    # objects fit in max_bytes.  The snapshot `keep` is never evicted.
+    # Returns the ids evicted.
+    #
+    def evict(self, keep=None, now=None):
+        now = time.time() if now is None else now
+        evicted = []
+        with self.lock:
+            for snapshot in sorted(self.index, key=lambda s: s['stored_at']):
+                if snapshot['id'] == keep:
+                    continue
+                too_old = self.max_age is not None and now - snapshot['stored_at'] > self.max_age
+                too_big = self.max_bytes is not None and self.stored_bytes() > self.max_bytes
+                if not (too_old or too_big):
+                    # snapshots are oldest first, so the rest are kept too
+                    break
+                self.remove(snapshot['id'])
+                evicted.append(snapshot['id'])
+            if evicted:
+                self.save_index()
+        return evicted
+
+    def stored_bytes(self):
+        return sum(self.object_sizes.values())
+
+    #
+    # How much the archive holds, and how much it would take without
+    # sharing members between snapshots
+    #
+    def stats(self):
+        with self.lock:
+            return {
+                'snapshots': len(self.index),
+                'objects': len(self.object_sizes),
+                'stored_bytes': self.stored_bytes(),
+                'snapshot_bytes': sum(s['size'] for s in self.index),
+            }
@@ -0,0 +1,271 @@
+#!/usr/bin/python
+
+import copy
+import difflib
+import io
+import struct
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+import xml.dom.minidom
+
+#
+# Helpers that work on saved configuration archives (the zips MVCM hands
+# out for a saved configuration) member by member, without extracting
+# them to disk.  Nothing here changes the working directory or keeps any
+# state between calls, so several merges can run at once.
+#
+
+# Directories of a merged configuration that come from the target server
+TARGET_DIRECTORIES = ('licensemanager', 'tomcat', 'security')
+
+DESCRIPTOR = 'descriptor.xml'
+
+# Size of the pieces raw member data is copied in
+COPY_CHUNK_SIZE = 256 * 1024
+
+# An archive handed over as an HTTP response is kept in memory up to this
+# size and spooled to a temporary file beyond it
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Fixed part of a zip local file header, see APPNOTE 4.3.7
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\003\004'
+
+# Data descriptor flag of ZipInfo.flag_bits
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+# Members diffed line by line; others are only reported as changed
+TEXT_SUFFIXES = ('.xml', '.txt', '.properties', '.conf', '.cfg', '.ini', '.json', '.yaml', '.yml',
+                 '.policy', '.csv', '.log', '.sh', '.bat', '.cmd')
+
+# Zip64 extra field id, rebuilt by zipfile when it writes the headers
+_EXTRA_ZIP64 = 0x0001
+
+
+#
+# Returns the offset of the compressed data of info inside the archive
+#
+def _data_offset(fp, info):
+    fp.seek(info.header_offset)
+    header = fp.read(_LOCAL_HEADER.size)
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f'Bad local header for {info.filename}')
+    name_length, extra_length = fields[-2], fields[-1]
+    return info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+
+
+#
+# Yields the stored (still compressed) bytes of a member of src, an open
+# ZipFile, in COPY_CHUNK_SIZE pieces
+#
+def read_raw_member(src, info, chunk_size=COPY_CHUNK_SIZE):
+    with src._lock:
+        offset = _data_offset(src.fp, info)
+    remaining = info.compress_size
+    while remaining > 0:
+        with src._lock:
+            src.fp.seek(offset)
+            chunk = src.fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f'Truncated data for {info.filename}')
+        offset += len(chunk)
+        remaining -= len(chunk)
+        yield chunk
+
+
+#
+# Adds a member to dest (a ZipFile open for writing) from its stored bytes.
+# info must carry the CRC and sizes of the data; a fresh local header is
+# written with them filled in, so no data descriptor is needed.
+#
+def write_raw_member(dest, info, chunks):
+    out = copy.copy(info)
+    out.flag_bits &= ~_FLAG_DATA_DESCRIPTOR
+    out.extra = zipfile._strip_extra(info.extra, (_EXTRA_ZIP64,))
+
+    with dest._lock:
+        if dest._writing:
+            raise ValueError("Can't copy a member while another is being written")
+        dest.fp.seek(dest.start_dir)
+        out.header_offset = dest.fp.tell()
+        zip64 = out.file_size > zipfile.ZIP64_LIMIT or out.compress_size > zipfile.ZIP64_LIMIT
+        dest.fp.write(out.FileHeader(zip64))
+        written = 0
+        for chunk in chunks:
+            dest.fp.write(chunk)
+            written += len(chunk)
+        if written != out.compress_size:
+            raise zipfile.BadZipFile(f'Expected {out.compress_size} bytes for {out.filename}, got {written}')
+        dest.start_dir = dest.fp.tell()
+        dest.filelist.append(out)
+        dest.NameToInfo[out.filename] = out
+    return out
+
+
+#
+# Copies a member from src (an open ZipFile) into dest as it is stored:
+# the compressed bytes are not inflated and deflated again
+#
+def copy_member(src, dest, info):
+    return write_raw_member(dest, info, read_raw_member(src, info))
+
+
+#
+# Returns descriptor.xml with its name and description replaced, laid out
+# the way the MVCM export writes it
+#
+def rewrite_descriptor(content, name=None, description=None):
+    root = ET.fromstring(content)
+
+    name_element = root.find('name')
+    if name_element is not None and name is not None:
+        name_element.text = name
+        print(f"Updated name in descriptor.xml to: {name_element.text}")
+
+    description_element = root.find('description')
+    if description_element is not None and description is not None:
+        description_element.text = description
+        print(f"Updated description in descriptor.xml to: {description_element.text}")
+
+    xml_content = ET.tostring(root, encoding='utf-8', xml_declaration=True)
+    return xml.dom.minidom.parseString(xml_content).toprettyxml(indent="    ").encode('utf-8')
+
+
+def top_directory(member_name):
+    return member_name.split('/', 1)[0] if '/' in member_name else None
+
+
+#
+# Writes merged_zip straight from the two exports: everything from the
+# source except TARGET_DIRECTORIES, which come from the target instead,
+# with descriptor.xml renamed.  Only descriptor.xml is decompressed; every
+# other member is copied as raw compressed bytes.
+#
+# Returns a summary dict with the member counts per directory.
+#
+def merge_archives(source_zip, target_zip, merged_zip, name=None, description=None,
+                   target_directories=TARGET_DIRECTORIES):
+    target_directories = set(target_directories)
+    summary = {'members': 0, 'copied': 0, 'rewritten': 0, 'directories': {d: 0 for d in target_directories}}
+    written = set()
+    found_descriptor = False
+
+    with zipfile.ZipFile(source_zip, 'r') as source, \
+            zipfile.ZipFile(target_zip, 'r') as target, \
+            zipfile.ZipFile(merged_zip, 'w') as merged:
+
+        for origin, from_target in ((source, False), (target, True)):
+            for info in origin.infolist():
+                directory = top_directory(info.filename)
+                if (directory in target_directories) != from_target or info.filename in written:
+                    continue
+                written.add(info.filename)
+                summary['members'] += 1
+                if directory in target_directories and not info.is_dir():
+                    summary['directories'][directory] += 1
+
+                if info.filename == DESCRIPTOR:
+                    found_descriptor = True
+                    out = zipfile.ZipInfo(info.filename, info.date_time)
+                    out.compress_type = info.compress_type
+                    out.external_attr = info.external_attr
+                    merged.writestr(out, rewrite_descriptor(origin.read(info), name, description))
+                    summary['rewritten'] += 1
+                else:
+                    copy_member(origin, merged, info)
+                    summary['copied'] += 1
+
+    if not found_descriptor:
+        print("Warning: descriptor.xml not found in source configuration")
+    return summary
+
+
+#
+# Opens a configuration archive given as a path, an open file, the bytes of
+# the zip, a ZipFile or the response of Mvcm.getzip
+#
+def open_archive(source):
+    if isinstance(source, zipfile.ZipFile):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return zipfile.ZipFile(io.BytesIO(source))
+    if hasattr(source, 'status_code') and hasattr(source, 'content'):
+        if not source.ok:
+            raise ValueError(f'HTTP {source.status_code} from {source.url}')
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        for chunk in source.iter_content(COPY_CHUNK_SIZE):
+            spool.write(chunk)
+        spool.seek(0)
+        return zipfile.ZipFile(spool)
+    return zipfile.ZipFile(source)
+
+
+def is_text_member(name, data, text_suffixes=TEXT_SUFFIXES):
+    if name.lower().endswith(text_suffixes):
+        return True
+    return b'\0' not in data[:8192]
+
+
+#
+# Compares two configuration archives.  Members are matched by name and
+# compared on the central directory alone (size and CRC32), so only the
+# members that differ are ever decompressed; changed text members get a
+# unified line diff with `context` lines around each change.
+#
+# Returns a dict with the 'added' and 'removed' member names, the
+# 'changed' members (name, old_size, new_size, and diff: a list of lines,
+# or None for binary members) and the number 'unchanged'.
+#
+def diff_archives(old, new, context=3, text_suffixes=TEXT_SUFFIXES):
+    old_zip = open_archive(old)
+    new_zip = open_archive(new)
+    try:
+        old_members = {i.filename: i for i in old_zip.infolist() if not i.is_dir()}
+        new_members = {i.filename: i for i in new_zip.infolist() if not i.is_dir()}
+        result = {
+            'added': sorted(n for n in new_members if n not in old_members),
+            'removed': sorted(n for n in old_members if n not in new_members),
+            'changed': [],
+            'unchanged': 0,
+        }
+
+        for name in sorted(n for n in old_members if n in new_members):
+            old_info, new_info = old_members[name], new_members[name]
+            if old_info.CRC == new_info.CRC and old_info.file_size == new_info.file_size:
+                result['unchanged'] += 1
+                continue
+
+            old_data = old_zip.read(old_info)
+            new_data = new_zip.read(new_info)
+            change = {'name': name, 'old_size': old_info.file_size, 'new_size': new_info.file_size, 'diff': None}
+            if is_text_member(name, old_data, text_suffixes) and is_text_member(name, new_data, text_suffixes):
+                change['diff'] = list(difflib.unified_diff(
+                    old_data.decode('utf-8', errors='replace').splitlines(),
+                    new_data.decode('utf-8', errors='replace').splitlines(),
+                    fromfile=f'a/{name}', tofile=f'b/{name}', n=context, lineterm=''))
+            result['changed'].append(change)
+        return result
+    finally:
+        if old_zip is not old:
+            old_zip.close()
+        if new_zip is not new:
+            new_zip.close()
+
+
+#
+# Text report of a diff_archives result
+#
+def format_diff(result):
+    lines = [f"{len(result['added'])} added, {len(result['removed'])} removed, "
+             f"{len(result['changed'])} changed, {result['unchanged']} unchanged"]
+    lines += [f'+ {name}' for name in result['added']]
+    lines += [f'- {name}' for name in result['removed']]
+    for change in result['changed']:
+        if change['diff'] is None:
+            lines.append(f"~ {change['name']} (binary, {change['old_size']} -> {change['new_size']} bytes)")
+        else:
+            lines.append(f"~ {change['name']}")
+            lines += change['diff']
+    return '\n'.join(lines)
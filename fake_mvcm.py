@@ -0,0 +1,487 @@
+#!/usr/bin/python
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+#
+# Local stand-in for the BMC AMI Console Management REST API (/mvcm-api),
+# covering the endpoints this app uses.  It is plain http, so point an
+# Mvcm(encrypted=False) at the host returned by start():
+#
+#     server = FakeMvcmServer(latency=0.02, zip_size=50 * 1024 * 1024)
+#     host = server.start()
+#     client = mvcm.Mvcm(encrypted=False)
+#     client.connect(host, 'user', 'password')
+#
+# latency is added to every request, error_rate is the fraction of
+# (non-logon) requests answered with a 503, zip_size is the size of the
+# generated saved-configuration archives and log_lines the length of the
+# CCS server logs.
+#
+
+API = '/mvcm-api'
+CHUNK_SIZE = 256 * 1024
+
+# Directories of a saved configuration, the ones update_configuration
+# swaps between servers are licensemanager, tomcat and security
+CONFIG_DIRS = ['licensemanager', 'tomcat', 'security', 'ccs', 'mvcm', 'cmdb']
+
+
+class FakeMvcmServer:
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, zip_size=1024 * 1024,
+                 log_lines=200, config_count=10, etag=True, range_support=True, seed=1):
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.zip_size = zip_size
+        self.log_lines = log_lines
+        self.etag = etag
+        self.range_support = range_support
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.workdir = tempfile.mkdtemp(prefix='fake_mvcm_')
+        self.sessions = set()
+        self.configs = {}  # name -> saved configuration dict
+        self.ccs_servers = {}  # name -> json body
+        self.ccs_sessions = {}  # (server, session) -> json body
+        self.version = 0
+        self.request_counts = {}
+        self.httpd = None
+        self.thread = None
+        for i in range(config_count):
+            self.add_config(f'config_{i:03d}', f'Saved configuration {i}', 'admin')
+
+    #
+    # Starts serving on a background thread, returns 'host:port'
+    #
+    def start(self):
+        handler = type('Handler', (FakeMvcmHandler,), {'server_state': self})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.host
+
+    @property
+    def host(self):
+        return f'127.0.0.1:{self.port}'
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key):
+        with self.lock:
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+    # ---------------------------------------------------------------
+    # Saved configurations
+    # ---------------------------------------------------------------
+    def config_path(self, name):
+        return os.path.join(self.workdir, re.sub(r'[^\w.-]', '_', name) + '.zip')
+
+    def add_config(self, name, description, user, zip_path=None):
+        # Generated archives are only built when first downloaded
+        path = self.config_path(name)
+        if zip_path is not None:
+            shutil.move(zip_path, path)
+        elif os.path.exists(path):
+            os.remove(path)
+        with self.lock:
+            self.configs[name] = {
+                'name': name,
+                'description': description,
+                'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'user': user,
+            }
+            self.version += 1
+
+    def remove_config(self, name):
+        with self.lock:
+            config = self.configs.pop(name, None)
+            if config is not None:
+                self.version += 1
+        if config is not None and os.path.exists(self.config_path(name)):
+            os.remove(self.config_path(name))
+        return config is not None
+
+    #
+    # Writes a saved-configuration zip of about zip_size bytes: a
+    # descriptor.xml, a few small text members per directory and stored
+    # (incompressible) padding so the archive really has the requested size
+    #
+    def build_zip(self, path, name, description):
+        rnd = random.Random(name)
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        with zipfile.ZipFile(part_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('descriptor.xml',
+                        '<?xml version="1.0" encoding="utf-8"?>\n'
+                        f'<configuration>\n    <name>{name}</name>\n'
+                        f'    <description>{description}</description>\n'
+                        '    <version>4.1.05</version>\n</configuration>\n')
+            for directory in CONFIG_DIRS:
+                for i in range(5):
+                    lines = [f'{directory}.setting{j} = {rnd.randint(0, 1000)}' for j in range(50)]
+                    zf.writestr(f'{directory}/settings{i}.properties', '\n'.join(lines) + '\n')
+            remaining = max(self.zip_size - zf.fp.tell(), 0)
+            padding_members = max(1, remaining // (8 * 1024 * 1024) + 1)
+            per_member = remaining // padding_members
+            for i in range(padding_members):
+                directory = CONFIG_DIRS[i % len(CONFIG_DIRS)]
+                with zf.open(zipfile.ZipInfo(f'{directory}/data{i}.bin'), 'w') as member:
+                    left = per_member
+                    while left > 0:
+                        n = min(CHUNK_SIZE, left)
+                        member.write(rnd.randbytes(n))
+                        left -= n
+        os.replace(part_path, path)
+
+    # ---------------------------------------------------------------
+    # CCS server logs
+    # ---------------------------------------------------------------
+    def log_text(self, server):
+        lines = [f'{datetime(2024, 1, 1).strftime("%Y-%m-%d")} {i:08d} {server} CCS0{i % 100:03d}I '
+                 f'status message number {i} for {server}' for i in range(self.log_lines)]
+        lines.append(f'{server} CCS0001I Initialization complete')
+        lines.append(f'{server} CCS0002I Listening for connections')
+        lines.append(f'{server} CCS0003I Ready')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class FakeMvcmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, don't let Nagle hold
+    # the body back for a delayed ACK
+    disable_nagle_algorithm = True
+    server_state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # the client dropped the connection, e.g. breaking off a download
+            pass
+
+    # ---------------------------------------------------------------
+    # Plumbing
+    # ---------------------------------------------------------------
+    def send_body(self, status, body=b'', content_type='application/json', headers=()):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_file(self, path, content_type):
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        status = 200
+        headers = [('Accept-Ranges', 'bytes')] if self.server_state.range_support else []
+        validators = ()
+        if self.server_state.etag:
+            stat = os.stat(path)
+            validators = (f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', formatdate(stat.st_mtime, usegmt=True))
+            headers += [('ETag', validators[0]), ('Last-Modified', validators[1])]
+        range_header = self.headers.get('Range')
+        # A Range with an If-Range that no longer matches gets the whole file
+        if_range = self.headers.get('If-Range')
+        if if_range is not None and if_range not in validators:
+            range_header = None
+        if range_header and self.server_state.range_support:
+            m = re.match(r'bytes=(\d*)-(\d*)$', range_header.strip())
+            if m and (m.group(1) or m.group(2)):
+                if m.group(1):
+                    start = int(m.group(1))
+                    end = int(m.group(2)) if m.group(2) else size - 1
+                else:
+                    start = max(size - int(m.group(2)), 0)
+                end = min(end, size - 1)
+                if start > end:
+                    self.send_body(416, b'', headers=[('Content-Range', f'bytes */{size}')])
+                    return
+                status = 206
+                headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        with open(path, 'rb') as f:
+            f.seek(start)
+            left = end - start + 1
+            while left > 0:
+                chunk = f.read(min(CHUNK_SIZE, left))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                left -= len(chunk)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def read_json(self):
+        body = self.read_body()
+        if not body:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    #
+    # Reads a multipart upload straight to a temp file, returns
+    # (filename, path).  Only the single-file form Mvcm.postbinary sends is
+    # understood.
+    #
+    def read_upload(self):
+        state = self.server_state
+        m = re.search(r'boundary=([^;]+)', self.headers.get('Content-Type', ''))
+        length = int(self.headers.get('Content-Length', 0))
+        if not m or not length:
+            self.read_body()
+            return None, None
+        closing = b'\r\n--' + m.group(1).strip('"').encode() + b'--'
+        head = b''
+        while b'\r\n\r\n' not in head and length > 0:
+            chunk = self.rfile.read(min(1024, length))
+            length -= len(chunk)
+            head += chunk
+        header_part, _, data = head.partition(b'\r\n\r\n')
+        fm = re.search(rb'filename="([^"]*)"', header_part)
+        filename = fm.group(1).decode('utf-8') if fm else f'upload_{uuid.uuid4().hex}.zip'
+        fd, path = tempfile.mkstemp(suffix='.zip', dir=state.workdir)
+        tail = b''
+        with os.fdopen(fd, 'wb') as f:
+            buf = data
+            while True:
+                # hold back enough bytes to strip the closing boundary
+                keep = len(closing) + 4
+                if len(buf) > keep:
+                    f.write(buf[:-keep])
+                    buf = buf[-keep:]
+                if length <= 0:
+                    break
+                chunk = self.rfile.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                buf += chunk
+            tail = buf
+            idx = tail.rfind(closing)
+            f.write(tail[:idx] if idx >= 0 else tail)
+        return filename, path
+
+    def authorized(self):
+        return self.headers.get('x-api-session') in self.server_state.sessions
+
+    # ---------------------------------------------------------------
+    # Dispatch
+    # ---------------------------------------------------------------
+    ROUTES = [
+        ('GET', r'/productinfo$', 'productinfo'),
+        ('POST', r'/viewerlogon$', 'viewerlogon'),
+        ('GET', r'/saved-configurations$', 'list_configs'),
+        ('POST', r'/saved-configurations$', 'upload_config'),
+        ('GET', r'/saved-configurations/([^/]+)$', 'download_config'),
+        ('POST', r'/saved-configurations/([^/]+)/operations/restore$', 'restore_config'),
+        ('POST', r'/saved-configurations/([^/]+)$', 'create_config'),
+        ('DELETE', r'/saved-configurations/([^/]+)$', 'delete_config'),
+        ('POST', r'(?:/api)?/ccs/servers/([^/]+)/operations/start$', 'start_ccs_server'),
+        ('POST', r'/ccs/servers/([^/]+)/sessions/([^/]+)$', 'create_ccs_session'),
+        ('POST', r'/ccs/servers/([^/]+)$', 'create_ccs_server'),
+        ('GET', r'/logs/download/1/([^/]+)/[^/]+\.log$', 'download_log'),
+    ]
+
+    def dispatch(self):
+        state = self.server_state
+        path = self.path.split('?', 1)[0]
+        if not path.startswith(API):
+            self.read_body()
+            return self.send_body(404, {'error': 'not found'})
+        path = path[len(API):]
+        for method, pattern, name in self.ROUTES:
+            m = re.match(pattern, path)
+            if m and method == self.command:
+                state.count(name)
+                if state.latency:
+                    time.sleep(state.latency)
+                if name not in ('productinfo', 'viewerlogon'):
+                    if state.error_rate and state.random.random() < state.error_rate:
+                        self.read_body()
+                        return self.send_body(503, b'Service Unavailable', 'text/plain',
+                                              headers=[('Retry-After', '0')])
+                    if not self.authorized():
+                        self.read_body()
+                        return self.send_body(401, {'error': 'not logged on'})
+                return getattr(self, name)(*[unquote(g) for g in m.groups()])
+        self.read_body()
+        self.send_body(404, {'error': 'not found'})
+
+    def do_GET(self):
+        self.dispatch()
+
+    def do_POST(self):
+        self.dispatch()
+
+    def do_DELETE(self):
+        self.dispatch()
+
+    # ---------------------------------------------------------------
+    # Endpoints
+    # ---------------------------------------------------------------
+    def productinfo(self):
+        self.send_body(200, {'product': 'BMC AMI Console Management', 'version': '4.1.05'}, headers=[
+            ('Set-Cookie', f'JSESSIONID={uuid.uuid4().hex}; Path=/; HttpOnly'),
+            ('Set-Cookie', f'XSRF-TOKEN={uuid.uuid4().hex}; Path=/'),
+        ])
+
+    def viewerlogon(self):
+        body = self.read_json() or {}
+        if not body.get('userid') or not body.get('password'):
+            return self.send_body(401, {'error': 'invalid credentials'})
+        session = uuid.uuid4().hex
+        self.server_state.sessions.add(session)
+        self.send_body(200, {'userid': body['userid']}, headers=[
+            ('Set-Cookie', f'x-api-session={session}; Path=/'),
+        ])
+
+    def list_configs(self):
+        state = self.server_state
+        with state.lock:
+            configs = list(state.configs.values())
+            etag = f'"v{state.version}"'
+        if state.etag and self.headers.get('If-None-Match') == etag:
+            return self.send_body(304, b'', headers=[('ETag', etag)])
+        headers = [('ETag', etag)] if state.etag else []
+        self.send_body(200, configs, headers=headers)
+
+    def create_config(self, name):
+        body = self.read_json() or {}
+        self.server_state.add_config(name, body.get('description') or '', 'admin')
+        self.send_body(201, self.server_state.configs[name])
+
+    def upload_config(self):
+        filename, path = self.read_upload()
+        if path is None or os.path.getsize(path) == 0:
+            return self.send_body(400, {'error': 'no file'})
+        name = os.path.splitext(os.path.basename(filename))[0]
+        self.server_state.add_config(name, f'Uploaded {filename}', 'admin', zip_path=path)
+        self.send_body(201, self.server_state.configs[name])
+
+    def download_config(self, name):
+        state = self.server_state
+        config = state.configs.get(name)
+        if config is None:
+            return self.send_body(404, {'error': f'{name} not found'})
+        path = state.config_path(name)
+        if not os.path.exists(path):
+            state.build_zip(path, name, config['description'])
+        self.send_file(path, 'application/zip')
+
+    def restore_config(self, name):
+        self.read_body()
+        if name not in self.server_state.configs:
+            return self.send_body(404, {'error': f'{name} not found'})
+        self.send_body(200, {'restored': name})
+
+    def delete_config(self, name):
+        if not self.server_state.remove_config(name):
+            return self.send_body(404, {'error': f'{name} not found'})
+        self.send_body(200, {'deleted': name})
+
+    def create_ccs_server(self, name):
+        body = self.read_json() or {}
+        with self.server_state.lock:
+            exists = name in self.server_state.ccs_servers
+            if not exists:
+                self.server_state.ccs_servers[name] = body
+        if exists:
+            return self.send_body(409, {'error': f'{name} already exists'})
+        self.send_body(201, {'name': name})
+
+    def create_ccs_session(self, server, session):
+        body = self.read_json() or {}
+        with self.server_state.lock:
+            exists = (server, session) in self.server_state.ccs_sessions
+            if not exists:
+                self.server_state.ccs_sessions[(server, session)] = body
+        if exists:
+            return self.send_body(409, {'error': f'{session} already exists on {server}'})
+        self.send_body(201, {'server': server, 'name': session})
+
+    def start_ccs_server(self, name):
+        self.read_body()
+        self.send_body(200, {'started': name})
+
+    def download_log(self, server):
+        state = self.server_state
+        path = os.path.join(state.workdir, re.sub(r'[^\w.-]', '_', server) + '.log')
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(state.log_text(server))
+        self.send_file(path, 'text/plain')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in MVCM REST API server')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--zip-size', type=int, default=1024 * 1024, help='bytes per saved configuration')
+    parser.add_argument('--log-lines', type=int, default=200)
+    parser.add_argument('--configs', type=int, default=10, help='saved configurations to start with')
+    parser.add_argument('--no-etag', action='store_true')
+    parser.add_argument('--no-range', action='store_true')
+    args = parser.parse_args()
+
+    server = FakeMvcmServer(port=args.port, latency=args.latency, error_rate=args.error_rate,
+                            zip_size=args.zip_size, log_lines=args.log_lines, config_count=args.configs,
+                            etag=not args.no_etag, range_support=not args.no_range)
+    host = server.start()
+    # The benchmark reads this line to find the port
+    print(f'listening {host}', flush=True)
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,185 @@ import os
 import mvcm
 from business import BusinessController
 from business import ExcelParser
+from business import format_update_timings, format_download_summary
+from business import CCS_SERVER_EXCLUDED_COLUMNS, CCS_SESSION_EXCLUDED_COLUMNS
+from business import DEFAULT_VERIFY_CONCURRENCY
+from configindex import ConfigIndex, date_key
+import itertools
+import time
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import messagebox
+from tkinter import simpledialog
 from tkinter import PhotoImage
 
+# Worker threads shared by every network call the GUI starts, and how
+# often (ms) the Tk thread picks up finished calls
+TASK_WORKERS = 8
+TASK_POLL_MS = 50
+
+# How often (ms) verify_import shows the server checks finished so far
+VERIFY_POLL_MS = 100
+
+# Saved configuration table columns that sort on click, and their config field
+CONFIG_SORT_COLUMNS = {"Name": 'name', "Description": 'description', "Date": 'date', "User": 'user'}
+
+# -------------------------------
+# Background tasks – runs the blocking calls off the Tk thread
+# -------------------------------
+class TaskRunner:
+    """Shared worker pool for the GUI's network calls.
+
+    submit() starts a call on a worker thread and returns its Future.  When
+    it finishes, its on_done(result) / on_error(exception) callback runs on
+    the Tk thread: every finished job goes through one queue that poll()
+    drains with after().  A cancelled job gets on_cancel() instead (a call
+    already running can't be interrupted, its result is just dropped), and
+    the callbacks of a job whose owner widget is gone are skipped.
+    """
+    def __init__(self, root, max_workers=TASK_WORKERS):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gui-task')
+        self.finished = queue.Queue()
+        self.active = {}  # Future -> job dict, in submission order
+        self.listeners = []  # Called on the Tk thread whenever active changes
+        self.job_ids = itertools.count(1)
+        self.poll_job = self.root.after(TASK_POLL_MS, self.poll)
+
+    def submit(self, description, fn, *args, on_done=None, on_error=None, on_cancel=None, owner=None, **kwargs):
+        job = {'id': next(self.job_ids), 'description': description, 'owner': owner,
+               'on_done': on_done, 'on_error': on_error, 'on_cancel': on_cancel,
+               'cancelled': False, 'submitted': time.monotonic()}
+        future = self.executor.submit(fn, *args, **kwargs)
+        job['future'] = future
+        self.active[future] = job
+        future.add_done_callback(self.finished.put)
+        self.notify()
+        return future
+
+    def cancel(self, future):
+        """Cancel a job; returns False if it had already finished"""
+        job = self.active.get(future)
+        if job is None or job['cancelled']:
+            return False
+        job['cancelled'] = True
+        future.cancel()
+        self.notify()
+        return True
+
+    def jobs(self):
+        """The queued and running jobs, oldest first"""
+        return [dict(job, running=future.running()) for future, job in self.active.items()]
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def notify(self):
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"Error updating job list: {str(e)}")
+
+    def poll(self):
+        """Runs the callbacks of the jobs that finished since the last poll"""
+        changed = False
+        try:
+            while True:
+                future = self.finished.get_nowait()
+                job = self.active.pop(future, None)
+                if job is not None:
+                    changed = True
+                    self.complete(job, future)
+        except queue.Empty:
+            pass
+        if changed:
+            self.notify()
+        self.poll_job = self.root.after(TASK_POLL_MS, self.poll)
+
+    def complete(self, job, future):
+        owner = job['owner']
+        if owner is not None and not owner.winfo_exists():
+            return
+        try:
+            if job['cancelled'] or future.cancelled():
+                if job['on_cancel'] is not None:
+                    job['on_cancel']()
+            elif future.exception() is not None:
+                if job['on_error'] is not None:
+                    job['on_error'](future.exception())
+                else:
+                    print(f"Error in {job['description']}: {str(future.exception())}")
+            elif job['on_done'] is not None:
+                job['on_done'](future.result())
+        except Exception as e:
+            print(f"Error handling result of {job['description']}: {str(e)}")
+
+    def shutdown(self):
+        self.root.after_cancel(self.poll_job)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TaskQueueWindow(tk.Toplevel):
+    """Lists the jobs TaskRunner has queued or running, with Cancel"""
+    def __init__(self, parent, tasks):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.title("Background Jobs")
+        self.geometry("520x260")
+        self.transient(parent)
+
+        self.job_tree = ttk.Treeview(self, columns=("Job", "State", "Time"), show='headings')
+        self.job_tree.heading("Job", text="Job")
+        self.job_tree.heading("State", text="State")
+        self.job_tree.heading("Time", text="Time")
+        self.job_tree.column("Job", width=320)
+        self.job_tree.column("State", width=90)
+        self.job_tree.column("Time", width=70)
+        self.job_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        ttk.Button(self, text="Cancel selected", command=self.cancel_selected).pack(pady=5)
+
+        self.tasks.add_listener(self.refresh)
+        self.refresh()
+        self.tick()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        now = time.monotonic()
+        self.futures = {}
+        selected = set(self.job_tree.selection())
+        for item in self.job_tree.get_children():
+            self.job_tree.delete(item)
+        for job in self.tasks.jobs():
+            state = "Cancelling" if job['cancelled'] else "Running" if job['running'] else "Queued"
+            item_id = self.job_tree.insert("", tk.END, iid=str(job['id']), values=(
+                job['description'], state, f"{now - job['submitted']:.0f}s"))
+            self.futures[item_id] = job['future']
+            if item_id in selected:
+                self.job_tree.selection_add(item_id)
+
+    def tick(self):
+        # Keep the elapsed times moving
+        self.refresh()
+        self.tick_job = self.after(1000, self.tick)
+
+    def cancel_selected(self):
+        for item_id in self.job_tree.selection():
+            future = self.futures.get(item_id)
+            if future is not None:
+                self.tasks.cancel(future)
+
+    def destroy(self):
+        self.tasks.remove_listener(self.refresh)
+        self.after_cancel(self.tick_job)
+        super().destroy()
+
 # -------------------------------
 # Server Selection Panel – kept for reference
 # -------------------------------
@@ -93,13 +268,19 @@ class LoginPanel(tk.Frame):
 # Download/Restore Panel
 # -------------------------------
 class DownloadRestorePanel(tk.Frame):
-    def __init__(self, master, controller, username, action, **kwargs):
+    def __init__(self, master, controller, tasks, username, action, **kwargs):
         super().__init__(master, **kwargs)
         self.action = action
         self.saved_configs = None
         self.username = username
         self.controller = controller
+        self.tasks = tasks
         self.selected_config_name = None
+        self.config_items = {}  # (name, date, n) -> Treeview item id
+        self.config_values = {}  # Treeview item id -> the values it shows
+        self.config_index = ConfigIndex([])  # Filter/sort index over saved_configs
+        self.sort_field = None  # Config field the table is sorted on, None for server order
+        self.sort_reverse = False
         self.create_widgets()
         self.refresh_configs()
 
@@ -108,18 +289,22 @@ class DownloadRestorePanel(tk.Frame):
         container.pack(fill=tk.BOTH, expand=True)
         refresh_frame = ttk.Frame(container)
         refresh_frame.pack(fill=tk.X, pady=(0, 10))
-        refresh_button = ttk.Button(refresh_frame, text="↻ Refresh", command=self.refresh_configs)
+        refresh_button = ttk.Button(refresh_frame, text="↻ Refresh", command=lambda: self.refresh_configs(force=True))
         refresh_button.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(refresh_frame, text="Filter:").pack(side=tk.LEFT, padx=(5, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(refresh_frame, textvariable=self.filter_var, width=40)
+        self.filter_entry.pack(side=tk.LEFT)
+        self.filter_var.trace_add('write', lambda *args: self.apply_view())
         table_frame = ttk.Frame(container)
         table_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         self.config_tree = ttk.Treeview(table_frame, 
                                         columns=("Number", "Name", "Description", "Date", "User"), 
                                         show='headings')
-        self.config_tree.heading("Number", text="#")
-        self.config_tree.heading("Name", text="Name")
-        self.config_tree.heading("Description", text="Description")
-        self.config_tree.heading("Date", text="Date")
-        self.config_tree.heading("User", text="User")
+        self.config_tree.heading("Number", text="#", command=lambda: self.sort_configs(None))
+        for column in CONFIG_SORT_COLUMNS:
+            self.config_tree.heading(column, text=column,
+                                     command=lambda c=column: self.sort_configs(CONFIG_SORT_COLUMNS[c]))
         self.config_tree.column("Number", width=50)
         self.config_tree.column("Name", width=200)
         self.config_tree.column("Description", width=400)
@@ -132,36 +317,127 @@ class DownloadRestorePanel(tk.Frame):
         self.button_frame = ttk.Frame(self.master)
         self.button_frame.pack(side=tk.BOTTOM,pady=(0,10))
         process_button = tk.Button(self.button_frame, text=self.action, command=self.process_action)
-        process_button.pack(pady=10)
+        process_button.pack(side=tk.LEFT, padx=5, pady=10)
+        if self.action == 'Download':
+            matching_button = tk.Button(self.button_frame, text="Download Matching...",
+                                        command=self.download_matching)
+            matching_button.pack(side=tk.LEFT, padx=5, pady=10)
         self.bind_all('<KeyPress>', self.handle_number_key)
         self.config_tree.bind('<<TreeviewSelect>>', self.on_tree_select)
 
-    def refresh_configs(self):
+    def refresh_configs(self, force=False):
+        # The list is cached per host; the Refresh button always asks
+        # the server (a cheap 304 if it supports revalidation)
+        self.tasks.submit("Refresh saved configurations", self.controller.mvcm.get,
+                          "/saved-configurations", "application/json",
+                          cache=True, max_age=0 if force else None,
+                          on_done=self.show_configs,
+                          on_error=lambda e: print(f"Error refreshing configurations: {str(e)}"),
+                          owner=self)
+
+    def show_configs(self, r):
         try:
-            r = self.controller.mvcm.get("/saved-configurations", "application/json")
             if r.ok:
                 self.saved_configs = r.json()
-                for item in self.config_tree.get_children():
-                    self.config_tree.delete(item)
-                for idx, config in enumerate(self.saved_configs, 1):
-                    self.config_tree.insert("", tk.END, values=(
-                        str(idx),
-                        config['name'],
-                        config['description'],
-                        config['date'],
-                        config['user']
-                    ))
-                print("Configurations refreshed successfully!")
+                self.config_index = ConfigIndex(self.saved_configs)
+                changes = self.apply_view()
+                print(f"Configurations refreshed successfully! "
+                      f"({changes['added']} added, {changes['removed']} removed, {changes['changed']} changed)")
             else:
                 print(f"Failed to refresh configurations. Status code: {r.status_code}")
         except Exception as e:
             print(f"Error refreshing configurations: {str(e)}")
 
+    def apply_view(self):
+        """Shows the saved configs matching the filter, in the chosen order"""
+        configs = self.config_index.view(self.filter_var.get(), self.sort_field, self.sort_reverse)
+        return self.reconcile_configs(configs)
+
+    def sort_configs(self, field):
+        """Sort on a config field (None: as the server lists them); again to reverse"""
+        if field is not None and field == self.sort_field:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_field = field
+            self.sort_reverse = False
+        for column, column_field in CONFIG_SORT_COLUMNS.items():
+            arrow = (" ▼" if self.sort_reverse else " ▲") if column_field == self.sort_field else ""
+            self.config_tree.heading(column, text=column + arrow)
+        self.apply_view()
+
+    @staticmethod
+    def config_keys(configs):
+        """Key of each config: name and date, plus a counter for repeats"""
+        seen = {}
+        keys = []
+        for config in configs:
+            key = (config['name'], str(config['date']))
+            seen[key] = seen.get(key, 0) + 1
+            keys.append(key + (seen[key],))
+        return keys
+
+    def reconcile_configs(self, configs):
+        """Brings config_tree in line with configs, touching only what changed.
+
+        Rows are matched by config name and date, so a refresh only deletes,
+        inserts, updates or moves the rows that differ; the others (and the
+        selection) stay as they are, and the view stays on the same top row.
+        """
+        tree = self.config_tree
+        keys = self.config_keys(configs)
+        wanted = set(keys)
+
+        # Remember which row is at the top of the view
+        top_item = tree.identify_row(1) if self.config_items else ''
+
+        removed = [key for key in self.config_items if key not in wanted]
+        if removed:
+            tree.delete(*(self.config_items[key] for key in removed))
+            for key in removed:
+                self.config_values.pop(self.config_items.pop(key), None)
+
+        counts = {'added': 0, 'removed': len(removed), 'changed': 0, 'moved': False}
+        order = list(tree.get_children())
+        for idx, (key, config) in enumerate(zip(keys, configs)):
+            values = (str(idx + 1), str(config['name']), str(config['description']),
+                      str(config['date']), str(config['user']))
+            item_id = self.config_items.get(key)
+            if item_id is None:
+                item_id = tree.insert("", idx, values=values)
+                self.config_items[key] = item_id
+                self.config_values[item_id] = values
+                order.insert(idx, item_id)
+                counts['added'] += 1
+                continue
+            shown = self.config_values[item_id]
+            if shown != values:
+                # A row that only moved just gets its new number
+                if shown[1:] != values[1:]:
+                    counts['changed'] += 1
+                tree.item(item_id, values=values)
+                self.config_values[item_id] = values
+            if order[idx] != item_id:
+                tree.move(item_id, "", idx)
+                order.remove(item_id)
+                order.insert(idx, item_id)
+                counts['moved'] = True
+
+        if self.selected_config_name is not None and \
+                not any(key[0] == self.selected_config_name for key in keys):
+            self.selected_config_name = None
+        shifted = counts['added'] or counts['removed'] or counts['moved']
+        if shifted and top_item in self.config_values:
+            tree.yview_moveto(order.index(top_item) / len(order))
+        return counts
+
     def handle_number_key(self, event):
+        # Digits typed into the filter are part of the query
+        if event.widget is self.filter_entry:
+            return
         if event.char.isdigit():
             index = int(event.char)
-            if 1 <= index <= len(self.saved_configs):
-                children = self.config_tree.get_children()
+            children = self.config_tree.get_children()
+            if 1 <= index <= len(children):
                 self.config_tree.selection_remove(self.config_tree.selection())
                 self.config_tree.selection_set(children[index-1])
                 self.config_tree.focus(children[index-1])
@@ -174,37 +450,98 @@ class DownloadRestorePanel(tk.Frame):
             item = self.config_tree.item(selected[0])
             self.selected_config_name = item['values'][1]
 
+    def selected_config_names(self):
+        return [self.config_values[item][1] for item in self.config_tree.selection() if item in self.config_values]
+
     def process_action(self):
-        if self.action == 'Download' and self.selected_config_name:
+        selected = self.selected_config_names()
+        if self.action == 'Download' and len(selected) > 1:
+            self.download_batch(selected)
+        elif self.action == 'Download' and self.selected_config_name:
             dl_location = None
             if not dl_location:
                 dl_location = fr"C:\Users\{self.username}\OneDrive - Fiserv Corp\Documents\saved_configuration.zip"
-            try:
-                success = self.controller.download_configuration(self.selected_config_name, dl_location)
-                messagebox.showinfo("Download Successful", "Data has been successfully downloaded!")
-            except Exception as e:
-                messagebox.showerror("Download Failed", f"Failed to download config: {str(e)}")
-            if success:
-                print(f"Successfully downloaded the ZIP file to {dl_location}")
-            else:
-                print("Download failed.")
+            self.tasks.submit(f"Download {self.selected_config_name}", self.controller.download_configuration,
+                              self.selected_config_name, dl_location,
+                              on_done=lambda success: self.download_complete(success, dl_location),
+                              on_error=lambda e: messagebox.showerror(
+                                  "Download Failed", f"Failed to download config: {str(e)}"))
         elif self.action == 'Restore' and self.selected_config_name:
-            try:
-                success = self.controller.restore_configuration(self.selected_config_name)
-                messagebox.showinfo("Restore Successful", "Data has been successfully restored!")
-            except Exception as e:
-                messagebox.showerror("Restore Failed", f"Failed to restore config: {str(e)}")
-            if success:
-                print(f"Successfully restored")
-            else:
-                print("Restore failed.")
+            self.tasks.submit(f"Restore {self.selected_config_name}", self.controller.restore_configuration,
+                              self.selected_config_name,
+                              on_done=self.restore_complete,
+                              on_error=lambda e: messagebox.showerror(
+                                  "Restore Failed", f"Failed to restore config: {str(e)}"))
+
+    def documents_dir(self):
+        return fr"C:\Users\{self.username}\OneDrive - Fiserv Corp\Documents"
+
+    def ask_download_dir(self):
+        initial_dir = self.documents_dir() if os.path.isdir(self.documents_dir()) else None
+        return filedialog.askdirectory(title="Download configurations to", initialdir=initial_dir)
+
+    def download_batch(self, config_names):
+        """Downloads the configs in parallel, each to <name>.zip in a folder the user picks"""
+        dest_dir = self.ask_download_dir()
+        if not dest_dir:
+            return
+        self.tasks.submit(f"Download {len(config_names)} configurations",
+                          self.controller.download_configurations, config_names, dest_dir,
+                          on_done=self.batch_complete,
+                          on_error=lambda e: messagebox.showerror(
+                              "Download Failed", f"Failed to download configs: {str(e)}"))
+
+    def download_matching(self):
+        """Downloads every config whose name matches a pattern such as nightly_*"""
+        pattern = simpledialog.askstring("Download Matching",
+                                         "Download the configurations named (* and ? match anything):",
+                                         parent=self)
+        if not pattern:
+            return
+        dest_dir = self.ask_download_dir()
+        if not dest_dir:
+            return
+
+        def download():
+            config_names = self.controller.configurations_matching(pattern)
+            if not config_names:
+                raise ValueError(f"No saved configuration matches {pattern}")
+            return self.controller.download_configurations(config_names, dest_dir)
+
+        self.tasks.submit(f"Download configurations matching {pattern}", download,
+                          on_done=self.batch_complete,
+                          on_error=lambda e: messagebox.showerror(
+                              "Download Failed", f"Failed to download configs: {str(e)}"))
+
+    def batch_complete(self, summary):
+        if summary['failed']:
+            messagebox.showwarning("Download Finished", format_download_summary(summary))
+        else:
+            messagebox.showinfo("Download Successful", format_download_summary(summary))
+
+    def download_complete(self, success, dl_location):
+        if success:
+            print(f"Successfully downloaded the ZIP file to {dl_location}")
+            messagebox.showinfo("Download Successful", "Data has been successfully downloaded!")
+        else:
+            print("Download failed.")
+            messagebox.showerror("Download Failed", "Failed to download config")
+
+    def restore_complete(self, success):
+        if success:
+            print(f"Successfully restored")
+            messagebox.showinfo("Restore Successful", "Data has been successfully restored!")
+        else:
+            print("Restore failed.")
+            messagebox.showerror("Restore Failed", "Failed to restore config")
 # -------------------------------
 # Upload Panel
 # -------------------------------
 class UploadPanel(tk.Frame):
-    def __init__(self, master, controller, **kwargs):
+    def __init__(self, master, controller, tasks, **kwargs):
         super().__init__(master, **kwargs)
         self.controller = controller
+        self.tasks = tasks
         self.selected_file = None
         self.create_widgets()
 
@@ -233,16 +570,19 @@ class UploadPanel(tk.Frame):
                 self.selected_file = filename
 
     def process_action(self):
-        success = self.controller.upload_configuration(self.selected_file)
-        print("Upload successful!" if success else "Upload failed.")
+        self.tasks.submit(f"Upload {os.path.basename(self.selected_file or '')}",
+                          self.controller.upload_configuration, self.selected_file,
+                          on_done=lambda success: print("Upload successful!" if success else "Upload failed."),
+                          on_error=lambda e: print(f"Upload failed: {str(e)}"))
 
 # -------------------------------
 # Create Panel
 # -------------------------------
 class CreatePanel(tk.Frame):
-    def __init__(self, master, controller, **kwargs):
+    def __init__(self, master, controller, tasks, **kwargs):
         super().__init__(master, **kwargs)
         self.controller = controller
+        self.tasks = tasks
         self.create_widgets()
 
     def create_widgets(self):
@@ -268,21 +608,27 @@ class CreatePanel(tk.Frame):
     def process_action(self):
         name, description = self.name_var.get(), self.desc_var.get()
         if name:
-            success = self.controller.create_configuration(name, description)
-            if success:
-                messagebox.showinfo("Create Successful", "Config has been successfully created!")
-            else:
-                messagebox.showerror("Create Failed", f"Failed to create saved config")
+            self.tasks.submit(f"Create {name}", self.controller.create_configuration, name, description,
+                              on_done=self.create_complete,
+                              on_error=lambda e: messagebox.showerror(
+                                  "Create Failed", f"Failed to create saved config: {str(e)}"))
         else:
             print("Name is required for creation.")
 
+    def create_complete(self, success):
+        if success:
+            messagebox.showinfo("Create Successful", "Config has been successfully created!")
+        else:
+            messagebox.showerror("Create Failed", f"Failed to create saved config")
+
 # -------------------------------
 # Update Panel
 # -------------------------------
 class UpdatePanel(tk.Frame):
-    def __init__(self, master, controller, servers, username, password, **kwargs):
+    def __init__(self, master, controller, tasks, servers, username, password, **kwargs):
         super().__init__(master, **kwargs)
         self.controller = controller
+        self.tasks = tasks
         self.servers = servers
         self.username = username
         self.password = password
@@ -363,27 +709,15 @@ class UpdatePanel(tk.Frame):
         # Create and show loading dialog
         loading_dialog = LoadingDialog(self, "Updating configuration, please wait...")
         loading_dialog.start()  # Start the progress bar animation
-        
-        def update_thread():
-            success = False
-            error_message = None
-            try:
-                success = self.controller.update_configuration(
-                    self.source_hostname,
-                    self.target_hostname,
-                    self.username,
-                    self.password
-                )
-            except Exception as e:
-                error_message = str(e)
-            finally:
-                # Schedule UI updates in the main thread
-                if loading_dialog.winfo_exists():  # Check if dialog still exists
-                    self.after(0, lambda: self.update_complete(loading_dialog, success, error_message))
-        
-        # Start the update process in a separate thread
-        thread = threading.Thread(target=update_thread, daemon=True)
-        thread.start()
+
+        # The results come back on the Tk thread
+        self.tasks.submit(f"Update {self.target_hostname} from {self.source_hostname}",
+                          self.controller.update_configuration,
+                          self.source_hostname, self.target_hostname, self.username, self.password,
+                          on_done=lambda success: self.update_complete(loading_dialog, success),
+                          on_error=lambda e: self.update_complete(loading_dialog, False, str(e)),
+                          on_cancel=lambda: self.update_complete(loading_dialog, False, "cancelled"),
+                          owner=loading_dialog)
 
     def update_complete(self, loading_dialog, success, error_message=None):
         try:          
@@ -391,9 +725,12 @@ class UpdatePanel(tk.Frame):
             if loading_dialog.winfo_exists():
                 loading_dialog.destroy()
             
-            # Show appropriate message
+            # Show appropriate message, with where the time went
             if success:
-                messagebox.showinfo("Success", "Update process completed successfully!")
+                message = "Update process completed successfully!"
+                if self.controller.last_update_timings:
+                    message += "\n\n" + format_update_timings(self.controller.last_update_timings)
+                messagebox.showinfo("Success", message)
             else:
                 error_msg = "Update failed." if not error_message else f"Update failed: {error_message}"
                 messagebox.showerror("Error", error_msg)
@@ -401,20 +738,352 @@ class UpdatePanel(tk.Frame):
             print(f"Error in update_complete: {str(e)}")
 
 
+# -------------------------------
+# Virtual Table – a Treeview that only holds the rows on screen
+# -------------------------------
+class VirtualTable(ttk.Frame):
+    """Scrollable, sortable table over a list of row tuples.
+
+    The Treeview only ever has as many items as fit in the window; scrolling
+    rewrites their values from `rows`, so showing a sheet takes the same time
+    however many rows it has.  Rows are addressed by their index in `rows`
+    (sheet order) whatever the current sort, and emit <<TableSelect>> when
+    the selected row changes.
+    """
+    TAG_COLORS = {'success': '#90EE90', 'failure': '#FFCCCB'}  # Light green / light red
+
+    def __init__(self, master, headers, rows, column_width=100, sort_keys=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.headers = list(headers)
+        self.sort_keys = sort_keys or {}  # Header -> key function replacing sort_key
+        self.rows = rows
+        self.order = None  # Display position -> row index, None for sheet order
+        self.positions = None  # Row index -> display position
+        self.row_tags = {}
+        self.top = 0
+        self.visible = 0
+        self.items = []
+        self.selected = None
+        self.sort_column = None
+        self.sort_reverse = False
+        self.load_job = None
+
+        style = ttk.Style(self)
+        self.row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+
+        self.tree = ttk.Treeview(self, columns=self.headers, show='headings', selectmode='browse')
+        for tag, color in self.TAG_COLORS.items():
+            self.tree.tag_configure(tag, background=color)
+        for header in self.headers:
+            self.tree.heading(header, text=header, command=lambda h=header: self.sort_by(h))
+            self.tree.column(header, width=column_width)
+
+        self.y_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        x_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+
+        # Pack x_scrollbar first at the bottom, the treeview last so it fills the rest
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', self.on_wheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page-'), ('<Next>', 'page+')):
+            self.tree.bind(key, lambda e, step=step: self.move_selection(step))
+        self.tree.bind('<Home>', lambda e: self.select_position(0))
+        self.tree.bind('<End>', lambda e: self.select_position(len(self.rows) - 1))
+
+        self.set_visible(10)
+
+    def extend(self, rows):
+        """Append rows (keeping the current sort) and repaint"""
+        self.rows.extend(rows)
+        if self.sort_column is not None:
+            self.apply_sort()
+        self.set_visible(self.visible)
+
+    def load(self, batches, on_done=None, on_error=None):
+        """Append batches of rows from an iterator, one per Tk idle turn.
+
+        The first batch is shown straight away and the window stays usable
+        while the rest arrive.  on_done() runs after the last batch,
+        on_error(exception) if the iterator raises.
+        """
+        try:
+            batch = next(batches, None)
+        except Exception as e:
+            self.load_job = None
+            if on_error is not None:
+                on_error(e)
+            return
+        if batch is None:
+            self.load_job = None
+            if on_done is not None:
+                on_done()
+            return
+        self.extend(batch)
+        self.load_job = self.after(1, self.load, batches, on_done, on_error)
+
+    def destroy(self):
+        # Stop feeding rows into a table that's gone
+        if self.load_job is not None:
+            self.after_cancel(self.load_job)
+            self.load_job = None
+        super().destroy()
+
+    def set_rows(self, rows, keep_sort=False):
+        """Replace the data, dropping tags and selection (and the sort, unless keep_sort)"""
+        self.rows = rows
+        self.order = self.positions = None
+        self.row_tags = {}
+        self.selected = None
+        self.top = 0
+        if keep_sort and self.sort_column is not None:
+            self.apply_sort()
+        else:
+            self.sort_column = None
+            for h in self.headers:
+                self.tree.heading(h, text=h)
+        self.set_visible(self.visible)
+
+    def row_count(self):
+        return len(self.rows)
+
+    def row_values(self, row):
+        return self.rows[row]
+
+    def selected_row(self):
+        return self.selected
+
+    def set_row_tag(self, row, tag):
+        """Tag a row ('success', 'failure' or None to clear) and repaint it if on screen"""
+        if tag is None:
+            self.row_tags.pop(row, None)
+        else:
+            self.row_tags[row] = tag
+        offset = self.position(row) - self.top
+        if 0 <= offset < len(self.items):
+            self.tree.item(self.items[offset], tags=(tag,) if tag else ())
+
+    def row_at(self, position):
+        return self.order[position] if self.order is not None else position
+
+    def position(self, row):
+        return self.positions[row] if self.positions is not None else row
+
+    def set_visible(self, count):
+        """Keep exactly `count` (or fewer, for short tables) Treeview items"""
+        self.visible = max(1, count)
+        wanted = min(self.visible, len(self.rows))
+        while len(self.items) < wanted:
+            self.items.append(self.tree.insert("", tk.END, values=()))
+        while len(self.items) > wanted:
+            self.tree.delete(self.items.pop())
+        self.tree.configure(height=self.visible)
+        self.scroll_to(self.top)
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, len(self.rows) - len(self.items)))
+        self.render()
+
+    def scroll(self, count):
+        self.scroll_to(self.top + count)
+
+    def render(self):
+        selected_item = None
+        for offset, item_id in enumerate(self.items):
+            row = self.row_at(self.top + offset)
+            tag = self.row_tags.get(row)
+            self.tree.item(item_id, values=self.rows[row], tags=(tag,) if tag else ())
+            if row == self.selected:
+                selected_item = item_id
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        total = len(self.rows)
+        if total:
+            self.y_scrollbar.set(self.top / total, (self.top + len(self.items)) / total)
+        else:
+            self.y_scrollbar.set(0, 1)
+
+    def on_resize(self, event):
+        # The heading takes about one row; only whole rows are shown so the
+        # Treeview itself never scrolls
+        count = max(1, event.height // self.row_height - 1)
+        if count != self.visible:
+            self.set_visible(count)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif action == 'scroll':
+            step = len(self.items) if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+
+    def on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-delta * 3)
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.items:
+            return
+        row = self.row_at(self.top + self.items.index(selection[0]))
+        if row != self.selected:
+            self.selected = row
+            self.event_generate('<<TableSelect>>')
+
+    def select_position(self, position):
+        if not self.rows:
+            return 'break'
+        position = max(0, min(position, len(self.rows) - 1))
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + len(self.items):
+            self.top = position - len(self.items) + 1
+        self.selected = self.row_at(position)
+        self.scroll_to(self.top)
+        self.event_generate('<<TableSelect>>')
+        return 'break'
+
+    def move_selection(self, step):
+        if step in ('page-', 'page+'):
+            step = len(self.items) if step == 'page+' else -len(self.items)
+        current = self.position(self.selected) if self.selected is not None else self.top - 1
+        return self.select_position(current + step)
+
+    @staticmethod
+    def sort_key(value):
+        # Numbers sort as numbers, everything else case-insensitively after them
+        try:
+            return (0, float(value), '')
+        except (TypeError, ValueError):
+            return (1, 0.0, str(value).lower())
+
+    def sort_by(self, header):
+        """Sort on a column; clicking the same heading again reverses it"""
+        self.sort_reverse = not self.sort_reverse if header == self.sort_column else False
+        self.sort_column = header
+        self.apply_sort()
+        for h in self.headers:
+            arrow = (' \u25bc' if self.sort_reverse else ' \u25b2') if h == header else ''
+            self.tree.heading(h, text=h + arrow)
+        self.scroll_to(0)
+
+    def apply_sort(self):
+        column = self.headers.index(self.sort_column)
+        rows = self.rows
+        sort_key = self.sort_keys.get(self.sort_column, self.sort_key)
+        self.order = sorted(range(len(rows)), key=lambda r: sort_key(rows[r][column]),
+                            reverse=self.sort_reverse)
+        self.positions = [0] * len(rows)
+        for position, row in enumerate(self.order):
+            self.positions[row] = position
+
+# -------------------------------
+# Fleet Panel – saved configurations of every server in one table
+# -------------------------------
+class FleetPanel(tk.Frame):
+    """Saved configurations of all the servers, in one table keyed by host.
+
+    Every server is logged on to and listed at once, one TaskRunner job
+    each, and its rows go into the table as soon as it answers, so the table
+    is complete after the slowest server rather than after all of them in
+    turn.  Sort on any column by clicking its heading.
+    """
+    HEADERS = ("Environment", "Host", "Name", "Description", "Date", "User")
+
+    def __init__(self, master, controller, tasks, servers, username, password, **kwargs):
+        super().__init__(master, **kwargs)
+        self.controller = controller
+        self.tasks = tasks
+        self.servers = servers  # List of tuples: (Environment, Hostname)
+        self.username = username
+        self.password = password
+        self.host_results = {}  # hostname -> BusinessController.host_inventory result
+        self.generation = 0  # Results of an older refresh are ignored
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        top_frame = ttk.Frame(self)
+        top_frame.pack(fill=tk.X, pady=(0, 10))
+        self.status_label = ttk.Label(top_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        refresh_button = ttk.Button(top_frame, text="↻ Refresh", command=lambda: self.refresh(force=True))
+        refresh_button.pack(side=tk.RIGHT, padx=5)
+        self.table = VirtualTable(self, self.HEADERS, [], column_width=150, sort_keys={"Date": date_key})
+        self.table.pack(fill=tk.BOTH, expand=True)
+
+    def refresh(self, force=False):
+        """Lists every server again (force: past the per-host cache)"""
+        self.generation += 1
+        self.host_results = {}
+        self.started = time.perf_counter()
+        for environment, hostname in self.servers:
+            self.tasks.submit(f"List configurations on {environment} ({hostname})",
+                              self.controller.host_inventory, environment, hostname,
+                              self.username, self.password, max_age=0 if force else None,
+                              on_done=lambda result, g=self.generation: self.host_loaded(result, g),
+                              on_error=lambda e, env=environment, host=hostname, g=self.generation:
+                                  self.host_loaded({'environment': env, 'host': host, 'ok': False,
+                                                    'error': str(e), 'configs': [], 'seconds': 0.0}, g),
+                              owner=self)
+        self.update_status()
+
+    def host_loaded(self, result, generation):
+        if generation != self.generation:
+            return
+        self.host_results[result['host']] = result
+        rows = [(config['environment'], config['host'], config['name'], config['description'],
+                 config['date'], config['user'])
+                for environment, hostname in self.servers if hostname in self.host_results
+                for config in self.host_results[hostname]['configs']]
+        self.table.set_rows(rows, keep_sort=True)
+        self.update_status()
+
+    def update_status(self):
+        done = len(self.host_results)
+        configs = self.table.row_count()
+        if done < len(self.servers):
+            text = f"Loaded {done} of {len(self.servers)} servers ({configs} configurations)..."
+        else:
+            slowest = max(self.host_results.values(), key=lambda r: r['seconds'])
+            text = (f"{configs} configurations on {len(self.servers)} servers in "
+                    f"{time.perf_counter() - self.started:.1f}s (slowest: {slowest['environment']}, "
+                    f"{slowest['seconds']:.1f}s)")
+        failed = [r for r in self.host_results.values() if not r['ok']]
+        if failed:
+            text += "  Failed: " + ", ".join(f"{r['environment']} ({r['error']})" for r in failed)
+        self.status_label.config(text=text)
+
 # -------------------------------
 # Create From Excel Panel
 # -------------------------------
 class CreateFromExcelPanel(tk.Frame):
-    def __init__(self, master, excel_parser, mvcm_inst, **kwargs):
+    def __init__(self, master, excel_parser, mvcm_inst, tasks, **kwargs):
         super().__init__(master, **kwargs)
         self.excel_parser = excel_parser
+        self.tasks = tasks
         self.selected_file = None
         self.create_widgets()
         self.mvcm_inst = mvcm_inst
         self.created_servers = []  # To store names of created servers
         self.verification_results = {}  # Store verification results for each server
+        self.import_results = []  # Per-row results of the last bulk create
+        self.import_errors = {}  # Treeview item id -> create error
+        self.verify_job = None  # Future of a running verification
+        self.verify_stop = threading.Event()
+        self.verify_results = queue.Queue()  # Checks finished, not yet shown
+        self.verify_poll_job = None
         self.notification_showing = False
-        self.colors_defined = False  # Track if colors have been defined
 
     def create_widgets(self):
         # Main container
@@ -514,65 +1183,51 @@ class CreateFromExcelPanel(tk.Frame):
             widget.destroy()
         
         try:
-            # Use the excel parser to read the file
-            headers, data = self.excel_parser.read_excel(self.selected_file)
-            
-            # Create new treeview for the data
-            self.data_tree = ttk.Treeview(self.table_frame, columns=headers, show='headings')
-            
-            # Define tag colors immediately after creating the treeview
-            self.data_tree.tag_configure('success', background='#90EE90')  # Light green
-            self.data_tree.tag_configure('failure', background='#FFCCCB')  # Light red
-            self.colors_defined = True
-            
-            # Set column headings
-            for header in headers:
-                self.data_tree.heading(header, text=header)
-                # Adjust column width based on content
-                self.data_tree.column(header, width=100)
-            
-            # Insert data rows
-            for row in data:
-                self.data_tree.insert("", tk.END, values=row)
+            # Stream the sheet in, a batch of rows at a time
+            headers, rows = self.excel_parser.stream_excel(self.selected_file)
             
-            # Add scrollbars
-            y_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.data_tree.yview)
-            self.data_tree.configure(yscrollcommand=y_scrollbar.set)
-            
-            x_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL, command=self.data_tree.xview)
-            self.data_tree.configure(xscrollcommand=x_scrollbar.set)
-            
-            # Pack everything in the right order
-            # Pack x_scrollbar first at the bottom
-            x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-            # Pack y_scrollbar at the right
-            y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            # Pack the treeview last, filling the remaining space
-            self.data_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            # Only the visible rows become Treeview items, the table
+            # defines the success/failure colors itself
+            self.data_tree = VirtualTable(self.table_frame, headers, [])
+            self.data_tree.pack(fill=tk.BOTH, expand=True)
+            self.import_errors = {}
             
             # Bind selection event to show details
-            self.data_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+            self.data_tree.bind("<<TableSelect>>", self.on_tree_select)
             
-            # Enable import button
-            self.import_button.config(state='normal')
+            # Enable import button once every row has arrived
+            self.import_button.config(state='disabled')
+            self.data_tree.load(self.excel_parser.iter_batches(rows),
+                                on_done=lambda: self.import_button.config(state='normal'),
+                                on_error=self.show_load_error)
             
         except Exception as e:
-            error_label = ttk.Label(self.table_frame, text=f"Error loading Excel file: {str(e)}", foreground="red")
-            error_label.pack(expand=True)   
-            self.import_button.config(state='disabled')
+            self.show_load_error(e)
+
+    def show_load_error(self, error):
+        for widget in self.table_frame.winfo_children():
+            widget.destroy()
+        error_label = ttk.Label(self.table_frame, text=f"Error loading Excel file: {str(error)}", foreground="red")
+        error_label.pack(expand=True)
+        self.import_button.config(state='disabled')
     
     def on_tree_select(self, event):
         """Handle selection of a row in the treeview"""
-        selected_items = self.data_tree.selection()
-        if not selected_items:
+        row = self.data_tree.selected_row()
+        if row is None:
             return
             
         # Get server name from the selected row
         # Assuming the first column contains the server name or an identifier
-        item_values = self.data_tree.item(selected_items[0], "values")
+        item_values = self.data_tree.row_values(row)
         if not item_values:
             return
             
+        # Errors from the create request itself
+        if row in self.import_errors:
+            self.show_notification(f"Create failed: {self.import_errors[row]}", error=True)
+            return
+
         server_name = item_values[0]  # Adjust index based on your actual data structure
         
         # Check if we have verification results for this server
@@ -582,21 +1237,59 @@ class CreateFromExcelPanel(tk.Frame):
                 self.show_notification(f"Error for {server_name}: {result['error_code']}", error=True)
     
     def import_data(self):
-        # This method would be implemented to handle the actual import process
-        # For example, sending the data to an API or processing it further
+        self.import_button.config(state='disabled')
+        self.tasks.submit(f"Create CCS servers from {os.path.basename(self.selected_file)}",
+                          self.create_servers,
+                          on_done=self.import_complete,
+                          on_error=self.import_failed,
+                          on_cancel=lambda: self.import_button.config(state='normal'),
+                          owner=self)
+
+    def create_servers(self):
+        """Runs on a worker: posts the sheet's servers, returns the per-row results"""
+        # Payloads are read from the sheet a batch at a time as they're posted
+        json_data = (record
+                     for batch in self.excel_parser.iter_json_data(exclude=CCS_SERVER_EXCLUDED_COLUMNS)
+                     for record in batch)
+        return self.excel_parser.create_ccs_servers_bulk(self.mvcm_inst, json_data)
+
+    def import_failed(self, error):
+        self.import_button.config(state='normal')
+        messagebox.showerror("Import Failed", f"Failed to import data: {str(error)}")
+
+    def import_complete(self, results):
+        self.import_button.config(state='normal')
         try:
-            # Example implementation:
-            json_data = self.excel_parser.get_json_data()
-            self.created_servers = self.excel_parser.extract_names(json_data)
-            result = self.excel_parser.create_ccs_server(self.mvcm_inst, json_data)
-            
-            messagebox.showinfo("Import Successful", "Data has been successfully imported!")
+            self.import_results = results
+
+            # Results are in sheet order, color each row from its result
+            self.import_errors = {}
+            for result in results:
+                if result['row'] < self.data_tree.row_count():
+                    self.set_row_status(result['row'], result['ok'])
+                    if not result['ok']:
+                        self.import_errors[result['row']] = f"{result['status'] or ''} {result['error'] or ''}".strip()
+
+            # Only the servers that were created can be verified
+            self.created_servers = [r['name'] for r in results if r['ok']]
+            failed = len(results) - len(self.created_servers)
+            if failed:
+                messagebox.showwarning("Import Finished",
+                                       f"Created {len(self.created_servers)} of {len(results)} CCS servers.\n"
+                                       f"{failed} failed, select a red row for the error.")
+            else:
+                messagebox.showinfo("Import Successful", "Data has been successfully imported!")
             
-            # Show verification prompt after successful import
-            self.show_verification_prompt()
+            # Show verification prompt after import
+            if self.created_servers:
+                self.show_verification_prompt()
             
         except Exception as e:
             messagebox.showerror("Import Failed", f"Failed to import data: {str(e)}")
+
+    def set_row_status(self, row, success):
+        """Tag a row (by sheet index) green for success or red for failure"""
+        self.data_tree.set_row_tag(row, 'success' if success else 'failure')
     
     def show_verification_prompt(self):
         """Shows a popup asking if the user wants to verify the servers"""
@@ -605,156 +1298,138 @@ class CreateFromExcelPanel(tk.Frame):
             self.verify_import()
     
     def verify_import(self):
-        """Verifies the imported servers by sending POST requests to start them"""
+        """Verifies the imported servers by starting them and checking their logs.
+
+        The checks run as one TaskRunner job that fans out on a pool of its
+        own (DEFAULT_VERIFY_CONCURRENCY at a time), so the shared workers
+        stay free for the rest of the GUI.  Results are shown on the Tk
+        thread as they come back, so the window stays responsive while
+        hundreds of servers are checked.
+        """
         if not self.created_servers:
             messagebox.showinfo("Verification", "No servers to verify.")
             return
+        if self.verify_job is not None:
+            return
         
         # Reset verification results
         self.verification_results = {}
-        
-        # Make sure color tags are defined - just in case
-        if not self.colors_defined:
-            self.data_tree.tag_configure('success', background='#90EE90')  # Light green
-            self.data_tree.tag_configure('failure', background='#FFCCCB')  # Light red
-            self.colors_defined = True
-        
-        success_count = 0
-        failure_count = 0
+
+        servers = [name for name in self.created_servers if name]
+        self.verify_counts = {'success': 0, 'failure': 0, 'done': 0, 'total': len(servers)}
+
+        # Index the rows once: server name column -> sheet row
+        self.verify_rows = [(row, str(values[3]))
+                            for row, values in enumerate(self.data_tree.rows)
+                            if len(values) > 3]
         
         # Create a progress bar
-        progress_window = tk.Toplevel(self)
-        progress_window.title("Verifying Servers")
-        progress_window.geometry("300x100")
-        progress_window.transient(self)
-        progress_window.grab_set()
-        
-        progress_label = ttk.Label(progress_window, text="Verifying servers...")
-        progress_label.pack(pady=10)
-        
-        progress = ttk.Progressbar(progress_window, length=250, mode='determinate')
-        progress.pack(pady=10)
-        progress['maximum'] = len(self.created_servers)
-        
-        # Process each server
-        for i, server_name in enumerate(self.created_servers):
-            if not server_name:
-                continue
-            
-            # Update progress
-            progress['value'] = i + 1
-            progress_label.config(text=f"Verifying {server_name}...")
-            progress_window.update()
-                
+        self.progress_window = tk.Toplevel(self)
+        self.progress_window.title("Verifying Servers")
+        self.progress_window.geometry("300x130")
+        self.progress_window.transient(self)
+        self.progress_window.grab_set()
+        self.progress_window.protocol("WM_DELETE_WINDOW", self.cancel_verify)
+        
+        self.progress_label = ttk.Label(self.progress_window, text="Verifying servers...")
+        self.progress_label.pack(pady=10)
+        
+        self.progress = ttk.Progressbar(self.progress_window, length=250, mode='determinate')
+        self.progress.pack(pady=5)
+        self.progress['maximum'] = len(servers)
+
+        ttk.Button(self.progress_window, text="Cancel", command=self.cancel_verify).pack(pady=5)
+
+        self.verify_stop = threading.Event()
+        self.verify_results = queue.Queue()
+        self.verify_job = self.tasks.submit(
+            f"Verify {len(servers)} servers", self.excel_parser.verify_ccs_servers,
+            self.mvcm_inst, servers, DEFAULT_VERIFY_CONCURRENCY,
+            on_result=self.verify_results.put, stop=self.verify_stop,
+            on_done=lambda results: self.verify_finished(),
+            on_error=self.verify_failed,
+            on_cancel=self.verify_finished,
+            owner=self)
+        self.verify_poll_job = self.after(VERIFY_POLL_MS, self.verify_poll)
+
+    def verify_poll(self):
+        """Shows the checks that finished since the last poll"""
+        self.show_verify_results()
+        self.verify_poll_job = self.after(VERIFY_POLL_MS, self.verify_poll)
+
+    def show_verify_results(self):
+        while True:
             try:
-                # Send POST request to start the server
-                endpoint = f"/api/ccs/servers/{server_name}/operations/start"
-                response = self.mvcm_inst.post(endpoint)
-
-                r = self.mvcm_inst.getlog(server_name)
-                log_text = r.text
-
-                # Split the log text into lines
-                lines = log_text.splitlines()
-
-                is_success = False
-                # Check if there are at least three lines
-                if len(lines) >= 3:
-                    # Get the third-to-last line
-                    third_to_last_line = lines[-3]
-                    
-                    # Check if the third-to-last line contains "Error exit"
-                    if "Error exit" in third_to_last_line:
-                        is_success = False
-                        print("The third-to-last line contains 'Error exit'.")
-                    else:
-                        is_success = True
-                        print("The third-to-last line does not contain 'Error exit'.")
-                else:
-                    print("The log does not have enough lines.")
-                
-                # Store result
-                self.verification_results[server_name] = {
-                    'success': is_success,
-                    'error': not is_success,
-                    'error_code': 'fail'
-                }
-                
-                # Update counts
-                if is_success:
-                    success_count += 1
-                else:
-                    failure_count += 1
-
-                # Color the corresponding row in the tree
-                # Find the item with this server name
-                for item_id in self.data_tree.get_children():
-                    item_values = self.data_tree.item(item_id, "values")
-                    if item_values and server_name in str(item_values[3]):  # Match on first column
-                        # First remove any existing tags
-                        current_tags = list(self.data_tree.item(item_id, "tags"))
-                        if 'success' in current_tags:
-                            current_tags.remove('success')
-                        if 'failure' in current_tags:
-                            current_tags.remove('failure')
-
-                            
-                        # Add the appropriate tag
-                        new_tag = 'success' if is_success else 'failure'
-                        current_tags.append(new_tag)
-                              
-                        # Update the item with the new tags
-                        self.data_tree.item(item_id, tags=current_tags)
-                        
-                        # Force a refresh of the row's appearance
-                        self.update_idletasks()
-                        break
-                        
-            except Exception as e:
-                # Handle exception
-                self.verification_results[server_name] = {
-                    'success': False,
-                    'error': True,
-                    'error_code': str(e)
-                }
-                failure_count += 1
-                
-                # Color the row red
-                for item_id in self.data_tree.get_children():
-                    item_values = self.data_tree.item(item_id, "values")
-                    if item_values and server_name in str(item_values[3]):
-                        # First remove any existing tags
-                        current_tags = list(self.data_tree.item(item_id, "tags"))
-                        if 'success' in current_tags:
-                            current_tags.remove('success')
-                        if 'failure' in current_tags:
-                            current_tags.remove('failure')
-                            
-                        # Add the failure tag
-                        current_tags.append('failure')
-                        
-                        # Update the item
-                        self.data_tree.item(item_id, tags=current_tags)
-                        
-                        # Force a refresh
-                        self.update_idletasks()
-                        break
-        
+                result = self.verify_results.get_nowait()
+            except queue.Empty:
+                return
+            self.verify_counts['done'] += 1
+            self.apply_verify_result(result)
+
+    def verify_failed(self, e):
+        messagebox.showerror("Verification Failed", f"Failed to verify servers: {str(e)}")
+        self.verify_finished()
+
+    def verify_finished(self):
+        self.after_cancel(self.verify_poll_job)
+        self.verify_poll_job = None
+        self.verify_job = None
+        self.show_verify_results()
+        self.verify_complete()
+
+    def apply_verify_result(self, result):
+        server_name = result['name']
+        is_success = result['success']
+        self.verification_results[server_name] = {
+            'success': is_success,
+            'error': not is_success,
+            'error_code': result['error_code']
+        }
+        self.verify_counts['success' if is_success else 'failure'] += 1
+
+        # Color the corresponding row in the tree
+        for row, name_value in self.verify_rows:
+            if server_name in name_value:
+                self.set_row_status(row, is_success)
+                break
+
+        if self.progress_window.winfo_exists():
+            self.progress['value'] = self.verify_counts['done']
+            self.progress_label.config(
+                text=f"Verified {self.verify_counts['done']} of {self.verify_counts['total']} ({server_name})")
+
+    def cancel_verify(self):
+        """Skips the checks that haven't started; running ones finish quietly"""
+        self.verify_stop.set()
+        if self.progress_window.winfo_exists():
+            self.progress_label.config(text="Cancelling...")
+
+    def destroy(self):
+        # Don't leave checks running for a panel that's gone
+        self.verify_stop.set()
+        if self.verify_poll_job is not None:
+            self.after_cancel(self.verify_poll_job)
+        super().destroy()
+
+    def verify_complete(self):
         # Close progress window
-        progress_window.destroy()
+        if self.progress_window.winfo_exists():
+            self.progress_window.destroy()
         
         # Show summary
         messagebox.showinfo("Verification Complete", 
-                           f"Verification complete.\nSuccessful: {success_count}\nFailed: {failure_count}\n\n"
+                           f"Verification complete.\nSuccessful: {self.verify_counts['success']}\n"
+                           f"Failed: {self.verify_counts['failure']}\n\n"
                            f"Select a server in the table for error details.")
 
 # -------------------------------
 # Create Console From Excel Panel
 # -------------------------------
 class CreateConsoleFromExcelPanel(tk.Frame):
-    def __init__(self, master, excel_parser, mvcm_inst, **kwargs):
+    def __init__(self, master, excel_parser, mvcm_inst, tasks, **kwargs):
         super().__init__(master, **kwargs)
         self.excel_parser = excel_parser
+        self.tasks = tasks
         self.selected_file = None
         self.create_widgets()
         self.mvcm_inst = mvcm_inst
@@ -813,54 +1488,52 @@ class CreateConsoleFromExcelPanel(tk.Frame):
             widget.destroy()
         
         try:
-            # Use the excel parser to read the file
-            headers, data = self.excel_parser.read_excel(self.selected_file, sheet_name=1)
+            # Stream the sheet in, a batch of rows at a time
+            headers, rows = self.excel_parser.stream_excel(self.selected_file, sheet_name=1)
             
-            # Create new treeview for the data
-            self.data_tree = ttk.Treeview(self.table_frame, columns=headers, show='headings')
+            # Only the visible rows become Treeview items
+            self.data_tree = VirtualTable(self.table_frame, headers, [])
+            self.data_tree.pack(fill=tk.BOTH, expand=True)
             
-            # Set column headings
-            for header in headers:
-                self.data_tree.heading(header, text=header)
-                # Adjust column width based on content
-                self.data_tree.column(header, width=100)
-            
-            # Insert data rows
-            for row in data:
-                self.data_tree.insert("", tk.END, values=row)
-            
-            # Add scrollbars
-            y_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.data_tree.yview)
-            self.data_tree.configure(yscrollcommand=y_scrollbar.set)
-            
-            x_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL, command=self.data_tree.xview)
-            self.data_tree.configure(xscrollcommand=x_scrollbar.set)
-            
-            # Pack everything
-            self.data_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-            
-            # Enable import button
-            self.import_button.config(state='normal')
+            # Enable import button once every row has arrived
+            self.import_button.config(state='disabled')
+            self.data_tree.load(self.excel_parser.iter_batches(rows),
+                                on_done=lambda: self.import_button.config(state='normal'),
+                                on_error=self.show_load_error)
             
         except Exception as e:
-            error_label = ttk.Label(self.table_frame, text=f"Error loading Excel file: {str(e)}", foreground="red")
-            error_label.pack(expand=True)   
-            self.import_button.config(state='disabled')
+            self.show_load_error(e)
+
+    def show_load_error(self, error):
+        for widget in self.table_frame.winfo_children():
+            widget.destroy()
+        error_label = ttk.Label(self.table_frame, text=f"Error loading Excel file: {str(error)}", foreground="red")
+        error_label.pack(expand=True)
+        self.import_button.config(state='disabled')
     
     def import_data(self):
-        # This method would be implemented to handle the actual import process
-        # For example, sending the data to an API or processing it further
-        try:
-            # Example implementation:
-            json = self.excel_parser.get_json_data()
-            print(json)
-            self.excel_parser.create_ccs_console(self.mvcm_inst, json)
-            # result = self.mvcm.post("/import-excel-data", json=self.excel_parser.get_json_data())
-            messagebox.showinfo("Import Successful", "Data has been successfully imported!")
-        except Exception as e:
-            messagebox.showerror("Import Failed", f"Failed to import data: {str(e)}")
+        self.import_button.config(state='disabled')
+        self.tasks.submit(f"Create consoles from {os.path.basename(self.selected_file)}",
+                          self.create_consoles,
+                          on_done=lambda _: self.import_finished("Import Successful",
+                                                                 "Data has been successfully imported!"),
+                          on_error=lambda e: self.import_finished("Import Failed",
+                                                                  f"Failed to import data: {str(e)}", error=True),
+                          on_cancel=lambda: self.import_button.config(state='normal'),
+                          owner=self)
+
+    def create_consoles(self):
+        """Runs on a worker: posts the sheet's consoles"""
+        json = self.excel_parser.get_json_data(exclude=CCS_SESSION_EXCLUDED_COLUMNS)
+        print(json)
+        return self.excel_parser.create_ccs_console(self.mvcm_inst, json)
+
+    def import_finished(self, title, message, error=False):
+        self.import_button.config(state='normal')
+        if error:
+            messagebox.showerror(title, message)
+        else:
+            messagebox.showinfo(title, message)
 
 # # -------------------------------
 # Action Panel – now features a banner with buttons,
@@ -869,9 +1542,10 @@ class CreateConsoleFromExcelPanel(tk.Frame):
 # and refreshes the saved configurations correctly when a new server is selected.
 # -------------------------------
 class ActionPanel(tk.Frame):
-    def __init__(self, master, controller, username, password, servers, **kwargs):
+    def __init__(self, master, controller, tasks, username, password, servers, **kwargs):
         super().__init__(master, **kwargs)
         self.controller = controller
+        self.tasks = tasks
         self.username = username
         self.password = password
         self.servers = servers  # List of tuples: (Environment, Hostname)
@@ -910,6 +1584,12 @@ class ActionPanel(tk.Frame):
             btn.pack(side=tk.LEFT, padx=5)
             self.action_buttons[option] = btn
 
+        # Background jobs in flight, click for the list
+        self.jobs_button = tk.Button(banner_frame, text="No jobs running", command=self.show_jobs,
+                                     relief="flat", bd=0, padx=10, pady=5)
+        self.jobs_button.pack(side=tk.RIGHT, padx=5)
+        self.tasks.add_listener(self.update_jobs_button)
+
         # ---------------------------
         # Orange line underneath the banner
         # ---------------------------
@@ -979,7 +1659,7 @@ class ActionPanel(tk.Frame):
         self.side_panel_buttons = {}
         
         # Create buttons for saved configurations in the side panel
-        options = ["Download", "Upload", "Restore", "Create", "Update"]
+        options = ["Download", "Upload", "Restore", "Create", "Update", "Fleet"]
         for option in options:
             btn = tk.Button(self.side_panel,
                            text=option,
@@ -1103,18 +1783,38 @@ class ActionPanel(tk.Frame):
         # but with a different title. You can add more specific content as needed.
 
     def set_server(self, server):
-        self.selected_server = server
+        # The label and panels only move to the new server once it's logged on
+        previous = self.selected_server
+        self.tasks.submit(f"Connect to {server[0]} ({server[1]})", self.connect_server, server,
+                          on_done=lambda new_configs: self.server_connected(server, new_configs),
+                          on_error=lambda e: self.connect_failed(server, previous, e),
+                          owner=self)
+
+    def show_current_server(self):
         # Update the server label in the current content area
         for widget in self.content_area.winfo_children():
             if isinstance(widget, ttk.Label) and hasattr(widget, 'cget') and widget.cget('text').startswith("Current Server:"):
-                widget.config(text=f"Current Server: {server[0]} ({server[1]})")
+                widget.config(text=f"Current Server: {self.selected_server[0]} ({self.selected_server[1]})")
                 break
-        
+
+    def connect_failed(self, server, previous, error):
+        self.selected_server = previous
+        self.show_current_server()
+        messagebox.showerror("Connect Failed", f"Failed to connect to {server[1]}: {str(error)}")
+
+    def connect_server(self, server):
+        """Runs on a worker: logs on to server and fetches its saved configurations"""
         self.controller.connect(server[1], self.username, self.password)
-        new_configs = self.controller.get_saved_configurations()
+        return self.controller.get_saved_configurations()
+
+    def server_connected(self, server, new_configs):
+        self.selected_server = server
+        self.show_current_server()
         self.saved_configs = new_configs
         print(f"Connected to new server: {server[0]} ({server[1]})")
         for widget in self.panel_container.winfo_children():
+            if hasattr(widget, 'mvcm_inst'):
+                widget.mvcm_inst = self.controller.mvcm
             if hasattr(widget, 'refresh_configs'):
                 widget.saved_configs = new_configs
                 widget.refresh_configs()
@@ -1133,25 +1833,30 @@ class ActionPanel(tk.Frame):
             widget.destroy()
 
         if action in ['Download', 'Restore']:
-            panel = DownloadRestorePanel(self.panel_container, self.controller,
+            panel = DownloadRestorePanel(self.panel_container, self.controller, self.tasks,
                                         self.username, self.current_action)
             panel.pack(fill=tk.BOTH, expand=True)
         elif action == 'Upload':
-            panel = UploadPanel(self.panel_container, self.controller)
+            panel = UploadPanel(self.panel_container, self.controller, self.tasks)
             panel.pack(fill=tk.BOTH, expand=True)
         elif action == 'Create':
-            panel = CreatePanel(self.panel_container, self.controller)
+            panel = CreatePanel(self.panel_container, self.controller, self.tasks)
             panel.pack(fill=tk.BOTH, expand=True)
         elif action == 'Update':
-            panel = UpdatePanel(self.panel_container, self.controller, self.servers, self.username, self.password)
+            panel = UpdatePanel(self.panel_container, self.controller, self.tasks, self.servers, self.username, self.password)
+            panel.pack(fill=tk.BOTH, expand=True)
+        elif action == 'Fleet':
+            panel = FleetPanel(self.panel_container, self.controller, self.tasks, self.servers,
+                               self.username, self.password)
             panel.pack(fill=tk.BOTH, expand=True)
         elif action == 'Create from Excel':
             excel_parser = ExcelParser()
-            panel = CreateFromExcelPanel(self.panel_container, excel_parser, self.controller.mvcm)
+            panel = CreateFromExcelPanel(self.panel_container, excel_parser, self.controller.mvcm, self.tasks)
             panel.pack(fill=tk.BOTH, expand=True)
         elif action == "Create Console from Excel":
             excel_parser = ExcelParser()
-            panel = CreateConsoleFromExcelPanel(self.panel_container, excel_parser, self.controller.mvcm)
+            panel = CreateConsoleFromExcelPanel(self.panel_container, excel_parser, self.controller.mvcm,
+                                                self.tasks)
             panel.pack(fill=tk.BOTH, expand=True)
     
     def toggle_side_panel(self):
@@ -1167,6 +1872,17 @@ class ActionPanel(tk.Frame):
             self.toggle_button.config(text="◀")  # Change arrow direction
             self.is_panel_expanded = True
 
+    def update_jobs_button(self):
+        count = len(self.tasks.active)
+        self.jobs_button.config(text=f"Jobs: {count} running" if count else "No jobs running")
+
+    def show_jobs(self):
+        TaskQueueWindow(self.winfo_toplevel(), self.tasks)
+
+    def destroy(self):
+        self.tasks.remove_listener(self.update_jobs_button)
+        super().destroy()
+
 # ------------------------------
 # LOADING SCREEN
 # ------------------------------
@@ -1238,6 +1954,8 @@ class MainApp(tk.Tk):
         self.username = None
         self.password = None
         self.geometry("1100x600")
+        # Every network call started from the panels runs here
+        self.tasks = TaskRunner(self)
         self.show_login()
 
     def show_login(self):
@@ -1254,14 +1972,16 @@ class MainApp(tk.Tk):
         try:    
             self.controller.connect(hostname, username, password)
         except Exception as e:
+            # Stay on the login panel; the action panel needs a connection
             messagebox.showerror("Log on Failed", f"{str(e)}")
+            return
         self.show_action_panel()
 
     def show_action_panel(self):
         for widget in self.winfo_children():
             widget.destroy()
         self.title("Manage Saved Configurations")
-        self.action_panel = ActionPanel(self, self.controller, self.username, self.password,
+        self.action_panel = ActionPanel(self, self.controller, self.tasks, self.username, self.password,
                                         self.servers)
         self.action_panel.pack(fill=tk.BOTH, expand=True)
 
@@ -1270,6 +1990,7 @@ def main():
     controller = BusinessController(mvcm_instance)
     app = MainApp(controller)
     app.mainloop()
+    app.tasks.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,18 +1,426 @@
 #!/usr/bin/python
 
+import asyncio
 import atexit
+import collections
+import functools
+import hashlib
+import random
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import time
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import json
+import socket
 import sys
+import threading
 from http import HTTPStatus
 from datetime import datetime
 import shutil
 import os
 import zipfile
+import configzip
 from datetime import datetime
 import xml.etree.ElementTree as ET
 import xml.dom.minidom
 
+# Default number of pooled keep-alive connections kept per host
+DEFAULT_POOL_SIZE = 10
+
+# Size of the pieces a streamed download is read and written in
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Size of the pieces a streamed upload reads from disk
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Server the CCS server logs are downloaded from, whichever server the
+# client is connected to
+LOG_HOST = 'qdlp2bcmapp0002.ess.fiserv.one'
+
+# Bytes asked for by the first Range request of getlog_tail, and the most
+# it grows to before reading the whole log instead
+LOG_TAIL_RANGE = 16 * 1024
+LOG_TAIL_MAX_RANGE = 4 * 1024 * 1024
+
+# Seconds a cached GET is served without asking the server again
+DEFAULT_CACHE_TTL = 30
+
+# Transport defaults: seconds to establish a connection / wait for data,
+# retries after the first attempt, and the backoff between them
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 300
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 10
+
+# Consecutive failures that open a host's circuit, and seconds before a
+# single trial request is let through again
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30
+
+
+#
+# Raised instead of sending a request while a host's circuit is open
+#
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+
+#
+# Per-host circuit breaker.  After `threshold` consecutive failures the
+# circuit opens and requests fail immediately; after `reset_timeout` seconds
+# one trial request is allowed (half-open) and its outcome closes or
+# re-opens the circuit.
+#
+class CircuitBreaker:
+
+    def __init__(self, host, threshold=DEFAULT_BREAKER_THRESHOLD, reset_timeout=DEFAULT_BREAKER_RESET):
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_request(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return
+            retry_in = max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+            raise CircuitOpenError(f'{self.host} is unavailable (circuit open, retry in {retry_in:.0f}s)')
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    #
+    # The request ended with an error that says nothing about the host
+    #
+    def cancel_trial(self):
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial_running:
+                    print(f'Circuit opened for {self.host} after {self.failures} failures')
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+#
+# Timeouts, retry/backoff rules and circuit breaker settings.  Only
+# idempotent verbs are retried, plus POSTs the caller marks as safe.
+#
+class TransportPolicy:
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 breaker_threshold=DEFAULT_BREAKER_THRESHOLD, breaker_reset=DEFAULT_BREAKER_RESET):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+
+    def attempts(self, method, retry=False):
+        if method in self.IDEMPOTENT_METHODS or retry:
+            return self.retries + 1
+        return 1
+
+    #
+    # Seconds to wait before retry number `attempt` (0 based): full jitter
+    # exponential backoff, or the server's Retry-After when it sent one
+    #
+    def backoff(self, attempt, r=None):
+        if r is not None and r.headers.get('Retry-After', '').isdigit():
+            return min(int(r.headers['Retry-After']), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+# Used by every Mvcm that isn't given its own.  It holds no state; each
+# Mvcm keeps its own circuit breaker per host.
+DEFAULT_POLICY = TransportPolicy()
+
+
+#
+# File-like multipart/form-data body for a single file.  requests sends
+# anything with read() and __len__ as a streamed body with a Content-Length,
+# so the file is read from disk a chunk at a time as the socket drains
+# instead of the whole multipart body being built in memory first.
+#
+class MultipartFileStream:
+
+    def __init__(self, f, filename, field='file', content_type='application/octet-stream',
+                 chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.file_size = os.fstat(f.fileno()).st_size
+        self.head = (f'--{self.boundary}\r\n'
+                     f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                     f'Content-Type: {content_type}\r\n\r\n').encode('utf-8')
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self.length = len(self.head) + self.file_size + len(self.tail)
+        self.sent = 0
+        self.peak_buffer = 0
+        self.started = None
+        self.finished = None
+        self._parts = [self.head, None, self.tail]  # None is the file body
+
+    def __len__(self):
+        return self.length - self.sent
+
+    #
+    # Starts the body over, so the request can be sent again
+    #
+    def rewind(self):
+        self.file.seek(0)
+        self._parts = [self.head, None, self.tail]
+        self.sent = 0
+        self.started = None
+        self.finished = None
+
+    def read(self, size=-1):
+        if self.started is None:
+            self.started = time.perf_counter()
+        if size is None or size < 0:
+            size = self.chunk_size
+        size = min(size, self.chunk_size)
+        data = b''
+        while self._parts and not data:
+            part = self._parts[0]
+            if part is None:
+                data = self.file.read(size)
+                if not data:
+                    self._parts.pop(0)
+            else:
+                data, rest = part[:size], part[size:]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+        self.sent += len(data)
+        self.peak_buffer = max(self.peak_buffer, len(data))
+        if data and self.progress is not None:
+            self.progress(self.sent, self.length)
+        if not self._parts and self.finished is None:
+            self.finished = time.perf_counter()
+        return data
+
+    def stats(self):
+        seconds = 0.0
+        if self.started is not None:
+            seconds = (self.finished or time.perf_counter()) - self.started
+        return {
+            'bytes': self.sent,
+            'file_size': self.file_size,
+            'seconds': seconds,
+            'bytes_per_sec': self.sent / seconds if seconds > 0 else 0.0,
+            'peak_buffer_bytes': self.peak_buffer,
+        }
+
+
+# The timing record of the request in flight on this thread, or None when
+# nobody subscribed to records (the timed connections then do nothing)
+_request_timing = threading.local()
+
+
+#
+# Connection mixin filling in the connect/ttfb fields of the current
+# timing record.  connect covers the DNS lookup, the TCP connect and (for
+# https) the TLS handshake, as urllib3 does them in one go.  A reused
+# keep-alive connection never calls connect(), so its record keeps
+# connect = 0 and reused = True.
+#
+class _TimedConnectionMixin:
+
+    def connect(self):
+        record = getattr(_request_timing, 'record', None)
+        if record is None:
+            return super().connect()
+        start = time.perf_counter()
+        super().connect()
+        record['connect'] = time.perf_counter() - start
+        record['reused'] = False
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        record = getattr(_request_timing, 'record', None)
+        if record is not None:
+            record['ttfb'] = time.perf_counter() - record['start']
+        return response
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+#
+# Per-host cache of GET responses.  Entries are served without a round trip
+# for ttl seconds, then revalidated with the ETag / Last-Modified the server
+# sent (if any).  Mvcm drops the entries of a collection whenever it sends a
+# POST/PUT/DELETE below it, so our own changes are never hidden.
+#
+class ResponseCache:
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL):
+        self.ttl = ttl
+        self.entries = {}  # (host, path, accept) -> entry
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def lookup(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def is_fresh(self, entry, max_age=None):
+        ttl = self.ttl if max_age is None else max_age
+        return time.monotonic() - entry['stored'] < ttl
+
+    def hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def store(self, key, r):
+        with self.lock:
+            self.misses += 1
+            if not r.ok:
+                self.entries.pop(key, None)
+                return
+            validators = {}
+            if 'ETag' in r.headers:
+                validators['If-None-Match'] = r.headers['ETag']
+            if 'Last-Modified' in r.headers:
+                validators['If-Modified-Since'] = r.headers['Last-Modified']
+            self.entries[key] = {'response': r, 'validators': validators,
+                                 'stored': time.monotonic()}
+
+    def revalidated(self, entry):
+        with self.lock:
+            self.revalidations += 1
+            entry['stored'] = time.monotonic()
+
+    #
+    # Drops cached GETs of path, of the collection it belongs to and of
+    # anything below it
+    #
+    def invalidate(self, host=None, path=None):
+        with self.lock:
+            if host is None:
+                self.entries = {}
+                return
+            for key in list(self.entries):
+                cached_host, cached_path = key[0], key[1]
+                if cached_host != host:
+                    continue
+                if (path is None or path == cached_path
+                        or path.startswith(cached_path + '/')
+                        or cached_path.startswith(path + '/')):
+                    del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'round_trips_saved': self.hits,
+                'entries': len(self.entries),
+            }
+
+
+#
+# HTTP adapter that keeps a pool of keep-alive connections per host and
+# can report how many of the requests sent through it reused a connection.
+#
+class PooledAdapter(HTTPAdapter):
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keepalive=True):
+        self.keepalive = keepalive
+        super().__init__(pool_connections=1, pool_maxsize=pool_size)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.keepalive:
+            # Also ask the OS to probe idle sockets so a pooled connection
+            # dropped by a firewall is noticed instead of hanging a request
+            pool_kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+    def connection_stats(self):
+        requests_sent = 0
+        connections_opened = 0
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+        return {
+            'requests': requests_sent,
+            'connections_opened': connections_opened,
+            'connections_reused': max(requests_sent - connections_opened, 0),
+        }
+
+
+# Requests that log on, and so are never answered with a logon retry
+LOGON_PATHS = ('/viewerlogon', '/productinfo')
+
+
+#
+# First byte of a 206 response's Content-Range ("bytes 100-199/200"), or
+# None if it has none
+#
+def content_range_start(r):
+    unit, _, spec = r.headers.get('Content-Range', '').partition(' ')
+    first = spec.split('-', 1)[0]
+    return int(first) if unit == 'bytes' and first.isdigit() else None
+
+
 #
 # This class manages the connection to the BMC AMI Console Management
 # server. 
@@ -20,6 +428,32 @@ import xml.dom.minidom
 class Mvcm:
     _traceon = False
 
+    #
+    # pool_size is the number of keep-alive connections kept per host,
+    # keepalive=False closes the connection after every request,
+    # encrypted=False talks plain http (local stand-in servers) and policy
+    # is the TransportPolicy (timeouts, retries, circuit breakers) to use.
+    # The circuit breakers themselves belong to this client, one per host.
+    #
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keepalive=True, encrypted=True, policy=None):
+        self.policy = policy if policy is not None else DEFAULT_POLICY
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.encrypted = encrypted
+        self.sessions = {}  # hostname -> requests.Session
+        self.session = None
+        self.last_upload = None
+        self.listeners = []  # subscribers to per-request timing records
+        self.cache = ResponseCache()
+        self.partial_downloads = {}  # .part path -> validator of the response it came from
+        self.logon_lock = threading.Lock()
+        self.user = None
+        self.breakers = {}  # hostname -> CircuitBreaker
+        self.log_host = LOG_HOST
+        self.breakers_lock = threading.Lock()
+        self.exit_registered = False
+        self.traceon = Mvcm._traceon
+
 
     #
     # Connect to the server (host) with the username and password
@@ -31,34 +465,84 @@ class Mvcm:
 
         requests.packages.urllib3.disable_warnings()
 
-        self.trace(f"connect {host} {user} {password}")
-        self.encrypted = True
+        if self.traceon:
+            self.trace(f"connect {host} {user} {password}")
         self.host = host
         self.user = user
         self.password = password
 
         self.apiSession = ''
-        self.cookies = {}  # Changed to regular dictionary
+        self.session = self.get_session(host)
+        self.cookies = self.session.cookies
 
         # GET of the product info to get initial cookies
         r = self.get('/productinfo')
-        self.trace(f'seed status = {r.status_code}')
-
-        # Parse Set-Cookie header
-        if 'Set-Cookie' in r.headers:
-            cookies_header = r.headers['Set-Cookie'].split(', ')
-            for cookie in cookies_header:
-                if 'JSESSIONID=' in cookie:
-                    self.jsessionid = cookie.split(';')[0].split('=')[1]
-                    self.cookies['JSESSIONID'] = self.jsessionid
-                elif 'XSRF-TOKEN=' in cookie:
-                    self.xsrf_token = cookie.split(';')[0].split('=')[1]
-                    self.cookies['XSRF-TOKEN'] = self.xsrf_token
+        if self.traceon:
+            self.trace(f'seed status = {r.status_code}')
+
+        # The session stores Set-Cookie values itself, keep the
+        # ones we care about handy as attributes
+        if 'JSESSIONID' in self.cookies:
+            self.jsessionid = self.cookies['JSESSIONID']
+        if 'XSRF-TOKEN' in self.cookies:
+            self.xsrf_token = self.cookies['XSRF-TOKEN']
 
         # Perform logon
         self.logon()
 
-        atexit.register(self.exiting)
+        if not self.exit_registered:
+            atexit.register(self.exiting)
+            self.exit_registered = True
+
+    #
+    # Returns the pooled session for a host, creating it on first use
+    #
+    def get_session(self, host):
+        session = self.sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.verify = False
+            adapter = PooledAdapter(self.pool_size, self.keepalive)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            if not self.keepalive:
+                session.headers['Connection'] = 'close'
+            session.hooks['response'].append(
+                lambda r, *args, **kwargs: self._sync_session_headers(session, r))
+            self.sessions[host] = session
+        return session
+
+    #
+    # Response hook: keeps the X-XSRF-TOKEN header in step with the cookie
+    #
+    def _sync_session_headers(self, session, r):
+        if 'XSRF-TOKEN' in session.cookies:
+            session.headers['X-XSRF-TOKEN'] = session.cookies['XSRF-TOKEN']
+        return r
+
+    #
+    # Connection reuse counters for the current host (or all hosts)
+    #
+    def connection_stats(self, host=None):
+        hosts = [host or self.host] if (host or self.session) else []
+        totals = {'requests': 0, 'connections_opened': 0, 'connections_reused': 0}
+        for h in hosts:
+            session = self.sessions.get(h)
+            if session is None:
+                continue
+            stats = session.get_adapter('https://').connection_stats()
+            for k in totals:
+                totals[k] += stats[k]
+        return totals
+
+    #
+    # Closes every pooled connection
+    #
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+        self.sessions = {}
+        self.session = None
 
 
     def logon(self):
@@ -68,12 +552,16 @@ class Mvcm:
         
         if r.status_code == 200:
             print("Logon Successful")
-            # Parse Set-Cookie header for x-api-session
-            if 'Set-Cookie' in r.headers:
+            # x-api-session comes back as a cookie and must be sent
+            # back as a header on every request
+            if 'x-api-session' in self.cookies:
+                self.apiSession = self.cookies['x-api-session']
+            elif 'Set-Cookie' in r.headers:
                 cookie_header = r.headers['Set-Cookie']
                 if 'x-api-session=' in cookie_header:
                     self.apiSession = cookie_header.split(';')[0].split('=')[1]
                     self.cookies['x-api-session'] = self.apiSession
+            self.session.headers['x-api-session'] = self.apiSession
 
             self.trace("saving cookies " + str(self.cookies))
         else:
@@ -84,143 +572,436 @@ class Mvcm:
         return self.apiSession
 
     #
-    # Performs an HTTP GET
+    # Subscribes fn(record) to the per-request timing records.  Records are
+    # only collected while at least one subscriber is registered; a record
+    # is a dict with host, method, path, status, bytes_out, bytes_in,
+    # connect (DNS lookup included), ttfb and total (seconds) and reused
+    # (keep-alive connection).
     #
-    def get(self, path, contentType = 'application/json'):
+    def subscribe(self, fn):
+        self.listeners.append(fn)
+        return fn
 
-        self.trace('=======================================================================')
-        headers = {}
-        if self.apiSession != None:
-            headers['x-api-session'] = self.apiSession 
-        
-        headers['Accept'] = contentType
+    def unsubscribe(self, fn):
+        if fn in self.listeners:
+            self.listeners.remove(fn)
 
-        self.trace(f'GET /mvcm-api{path}' )
-        self.traceheaders(headers)
-        self.trace('')
+    #
+    # Sends a request on the current host's session.  With no subscribers
+    # this is a plain session.request; otherwise the request is timed and a
+    # record is published (for stream=True once finish_record is called).
+    # Anything but a GET drops the cached GETs of the collection it touches.
+    #
+    # Requests get the policy's timeouts, idempotent ones (and retry=True
+    # POSTs) are retried on connection errors and 502/503/504, and every
+    # outcome is fed to the host's circuit breaker.
+    #
+    def request(self, method, path, url=None, retry=False, **kwargs):
+        session_header = self.session.headers.get('x-api-session') if self.session is not None else None
+        r = self._request(method, path, url, retry, **kwargs)
+        if r.status_code != 401 or self.user is None or path in LOGON_PATHS:
+            return r
 
-        #self.trace('cookie is ' + str(self.cookies))
-        fullurl = self.mkurl(path)
-        #self.trace(f'URL: {fullurl}')
-        r = requests.get(url=fullurl ,headers = headers, verify=False, cookies=self.cookies)
-        self.cookies.update(r.cookies)
-        self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
-        self.traceheaders(r.headers)
-        self.trace('')
+        # The server expired our session: log on again, once, and resend
+        # (unless the body was a stream that can't be sent twice)
+        print(f'{method} {path} returned 401, logging on to {self.host} again')
+        self.relogon(session_header)
+        data = kwargs.get('data')
+        if hasattr(data, 'read'):
+            if not hasattr(data, 'rewind'):
+                return r
+            data.rewind()
+        r.close()
+        return self._request(method, path, url, retry, **kwargs)
+
+    #
+    # Logs on again after the session expired.  session_header is the
+    # x-api-session the failed request was sent with; if another thread
+    # has already logged on again since, this does nothing.
+    #
+    def relogon(self, session_header):
+        with self.logon_lock:
+            if self.session.headers.get('x-api-session') != session_header:
+                return
+            self.session.headers.pop('x-api-session', None)
+            self.cookies.pop('x-api-session', None)
+            try:
+                self.logon()
+            except SystemExit:
+                # logon exits on a refused logon; here the caller sees the 401
+                print(f'Logon to {self.host} failed')
+
+    def breaker(self, host):
+        with self.breakers_lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, self.policy.breaker_threshold, self.policy.breaker_reset)
+                self.breakers[host] = breaker
+            return breaker
+
+    def _request(self, method, path, url=None, retry=False, **kwargs):
+        url = url or self.mkurl(path)
+        kwargs.setdefault('timeout', self.policy.timeout)
+        breaker = self.breaker(self.host)
+        attempts = self.policy.attempts(method, retry)
+        try:
+            for attempt in range(attempts):
+                breaker.before_request()
+                last = attempt == attempts - 1
+                try:
+                    r = self._send(method, path, url, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    breaker.record_failure()
+                    if last or isinstance(e, CircuitOpenError):
+                        raise
+                    delay = self.policy.backoff(attempt)
+                    print(f'{method} {path} failed ({type(e).__name__}), retrying in {delay:.1f}s')
+                    time.sleep(delay)
+                    continue
+                except Exception:
+                    breaker.cancel_trial()
+                    raise
+                if r.status_code in self.policy.RETRY_STATUSES:
+                    breaker.record_failure()
+                    if not last:
+                        delay = self.policy.backoff(attempt, r)
+                        print(f'{method} {path} returned {r.status_code}, retrying in {delay:.1f}s')
+                        r.close()
+                        time.sleep(delay)
+                        continue
+                else:
+                    breaker.record_success()
+                # lets a caller tell a retried create from a first attempt
+                r.attempts = attempt + 1
+                return r
+        finally:
+            if method not in ('GET', 'HEAD'):
+                self.cache.invalidate(self.host, path)
+
+    def _send(self, method, path, url, **kwargs):
+        if not self.listeners:
+            return self.session.request(method, url, **kwargs)
+
+        record = {'host': self.host, 'method': method, 'path': path, 'status': None,
+                  'bytes_out': 0, 'bytes_in': 0, 'connect': 0.0,
+                  'ttfb': None, 'total': None, 'reused': True, 'start': time.perf_counter()}
+        _request_timing.record = record
+        try:
+            r = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            record['error'] = str(e)
+            self.finish_record(record)
+            raise
+        finally:
+            _request_timing.record = None
+
+        record['status'] = r.status_code
+        record['bytes_out'] = int(r.request.headers.get('Content-Length', 0))
+        if kwargs.get('stream'):
+            r.trace_record = record
+        else:
+            self.finish_record(record, len(r.content))
+        return r
+
+    #
+    # Completes a timing record and hands it to the subscribers
+    #
+    def finish_record(self, record, bytes_in=0):
+        record['bytes_in'] = bytes_in
+        record['total'] = time.perf_counter() - record.pop('start')
+        for fn in list(self.listeners):
+            try:
+                fn(record)
+            except Exception as e:
+                print(f"Error in request record subscriber: {str(e)}")
+
+    #
+    # Performs an HTTP GET.  With cache=True a response younger than the
+    # cache TTL (or max_age seconds) is returned without a round trip, and an
+    # older one is revalidated with If-None-Match / If-Modified-Since.
+    #
+    def get(self, path, contentType = 'application/json', cache=False, max_age=None):
+        headers = {'Accept': contentType}
+
+        entry = None
+        if cache:
+            key = (self.host, path, contentType)
+            entry = self.cache.lookup(key)
+            if entry is not None:
+                if self.cache.is_fresh(entry, max_age):
+                    self.cache.hit()
+                    if self.traceon:
+                        self.trace(f'GET /mvcm-api{path} (cached)')
+                    return entry['response']
+                headers.update(entry['validators'])
+
+        if self.traceon:
+            self.trace('=======================================================================')
+            self.trace(f'GET /mvcm-api{path}' )
+            self.traceheaders(self.session.headers)
+            self.traceheaders(headers)
+            self.trace('')
+
+        r = self.request('GET', path, headers=headers)
+        if cache:
+            if r.status_code == 304 and entry is not None:
+                self.cache.revalidated(entry)
+                if self.traceon:
+                    self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+                return entry['response']
+            self.cache.store(key, r)
         if not r.ok:
             print(f'HTTP: {r.status_code} from {self.mkurl(path)}')
-        self.trace('content: ' + str(r.content)    )
-        data = r.json()
-        self.trace(json.dumps(data, indent=2))    
-        self.trace('=======================================================================')
+        if self.traceon:
+            self.traceresponse(r)
+            self.trace('=======================================================================')
         return r
     
     def getzip(self, path, contentType = 'zip'):
-        self.trace('=======================================================================')
-        headers = {}
-        if self.apiSession is not None:
-            headers['x-api-session'] = self.apiSession 
-        
-        headers['Accept'] = 'application/zip'
+        headers = {'Accept': 'application/zip'}
 
-        self.trace(f'GET /mvcm-api{path}')
-        self.traceheaders(headers)
-        self.trace('')
+        if self.traceon:
+            self.trace('=======================================================================')
+            self.trace(f'GET /mvcm-api{path}')
+            self.traceheaders(self.session.headers)
+            self.traceheaders(headers)
+            self.trace('')
 
-        fullurl = self.mkurl(path)
-        r = requests.get(url=fullurl, headers=headers, verify=False, cookies=self.cookies)
-        self.cookies.update(r.cookies)
-        self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
-        self.traceheaders(r.headers)
-        self.trace('')
+        r = self.request('GET', path, headers=headers)
         if not r.ok:
             print(f'HTTP: {r.status_code} from {self.mkurl(path)}')
-        self.trace('content: ' + str(r.content))
-        self.trace('=======================================================================')
+        if self.traceon:
+            self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+            self.traceheaders(r.headers)
+            self.trace(f'content: {len(r.content)} bytes')
+            self.trace('=======================================================================')
         return r
     
-    def getlog(self, server_name):
+    #
+    # Streams a zip straight into dest_path, hashing it on the way, so memory
+    # use is bounded by chunk_size instead of the archive size.  The data is
+    # written to dest_path + '.part' and only renamed over dest_path once the
+    # whole body arrived.  Returns a dict with status_code, ok, bytes (received
+    # by this call), size, resumed_from, sha256, seconds and bytes_per_sec.
+    #
+    # With resume=True a .part this instance left behind is continued with a
+    # Range request (If-Range on the ETag / Last-Modified it came with, if
+    # any), and is kept when this attempt fails too.  A server that answers
+    # with the whole file, or a range that doesn't line up, starts it over.
+    #
+    def download(self, path, dest_path, chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None, resume=False):
+        headers = {'Accept': 'application/zip'}
+        part_path = dest_path + '.part'
+        offset = 0
+        if resume and part_path in self.partial_downloads and os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            validator = self.partial_downloads[part_path]
+            if validator:
+                headers['If-Range'] = validator
+
+        if self.traceon:
+            self.trace('=======================================================================')
+            self.trace(f'GET /mvcm-api{path} -> {dest_path}')
+            self.traceheaders(self.session.headers)
+            self.traceheaders(headers)
+            self.trace('')
 
-        headers = {}
-        if self.apiSession != None:
-            headers['x-api-session'] = self.apiSession 
-        
+        result = {'status_code': None, 'ok': False, 'bytes': 0, 'size': 0, 'resumed_from': 0,
+                  'sha256': None, 'seconds': 0.0, 'bytes_per_sec': 0.0}
+        start = time.perf_counter()
+        with self.request('GET', path, headers=headers, stream=True) as r:
+            record = getattr(r, 'trace_record', None)
+            result['status_code'] = r.status_code
+            if self.traceon:
+                self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+                self.traceheaders(r.headers)
+            resumed = offset and r.status_code == 206 and content_range_start(r) == offset
+            if offset and not resumed and r.status_code in (206, 416):
+                # The .part can't be continued: drop it and ask for the whole file
+                if record is not None:
+                    self.finish_record(record, 0)
+                self.discard_partial(part_path)
+                r.close()
+                return self.download(path, dest_path, chunk_size, progress)
+            if not r.ok:
+                print(f'HTTP: {r.status_code} from {self.mkurl(path)}')
+                if record is not None:
+                    self.finish_record(record, len(r.content))
+                return result
+
+            digest = hashlib.sha256()
+            if resumed:
+                with open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(chunk_size), b''):
+                        digest.update(chunk)
+                result['resumed_from'] = offset
+            else:
+                offset = 0
+            length = int(r.headers.get('Content-Length', 0))
+            total = offset + length if length else None
+            self.partial_downloads[part_path] = r.headers.get('ETag') or r.headers.get('Last-Modified')
+            try:
+                with open(part_path, 'ab' if resumed else 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        digest.update(chunk)
+                        result['bytes'] += len(chunk)
+                        if progress is not None:
+                            progress(offset + result['bytes'], total)
+                os.replace(part_path, dest_path)
+                self.partial_downloads.pop(part_path, None)
+            except Exception:
+                if not resume:
+                    self.discard_partial(part_path)
+                raise
+            finally:
+                if record is not None:
+                    self.finish_record(record, result['bytes'])
+
+        result['seconds'] = time.perf_counter() - start
+        result['size'] = offset + result['bytes']
+        result['sha256'] = digest.hexdigest()
+        result['ok'] = True
+        if result['seconds'] > 0:
+            result['bytes_per_sec'] = result['bytes'] / result['seconds']
+        if self.traceon:
+            self.trace(f"{result['bytes']} bytes in {result['seconds']:.2f}s "
+                       f"({result['bytes_per_sec'] / 1024 / 1024:.2f} MB/s) sha256={result['sha256']}")
+            self.trace('=======================================================================')
+        return result
+
+    def discard_partial(self, part_path):
+        self.partial_downloads.pop(part_path, None)
+        if os.path.exists(part_path):
+            os.remove(part_path)
 
-        self.traceheaders(headers)
+    def getlog(self, server_name):
+        path = f'/logs/download/1/{server_name}/{server_name}.log'
+        fullurl = self.logurl(path)
+        if self.traceon:
+            self.trace(f'GET {fullurl}')
+            self.traceheaders(self.session.headers)
 
-        #self.trace('cookie is ' + str(self.cookies))
-        fullurl = f'https://qdlp2bcmapp0002.ess.fiserv.one/mvcm-api/logs/download/1/{server_name}/{server_name}.log'
-        #self.trace(f'URL: {fullurl}')
-        r = requests.get(url=fullurl ,headers = headers, verify=False, cookies=self.cookies)
-        self.cookies.update(r.cookies)
+        r = self.request('GET', path, url=fullurl)
         return r
     #
+    # Returns the last `lines` lines of a CCS server log without downloading
+    # all of it.  Asks for the end of the file with a suffix Range request
+    # (growing it until enough lines arrived); when the server ignores Range
+    # the body is streamed through a ring buffer of `lines` lines.  Lines
+    # are split like str.splitlines() on '\n', so a trailing newline doesn't
+    # count as an empty last line.  Reads from log_host, like getlog.
+    #
+    def getlog_tail(self, server_name, lines=3, range_bytes=LOG_TAIL_RANGE):
+        path = f'/logs/download/1/{server_name}/{server_name}.log'
+        fullurl = self.logurl(path)
+        if self.traceon:
+            self.trace(f'GET {fullurl} (last {lines} lines)')
+
+        while True:
+            r = self.request('GET', path, url=fullurl, headers={'Range': f'bytes=-{range_bytes}'}, stream=True)
+            record = getattr(r, 'trace_record', None)
+            with r:
+                if r.status_code == 206:
+                    data = r.content
+                    if record is not None:
+                        self.finish_record(record, len(data))
+                    content_range = r.headers.get('Content-Range', '')
+                    from_start = content_range.startswith('bytes 0-')
+                    text = data.decode('utf-8', errors='replace')
+                    tail = text.split('\n')
+                    if tail and tail[-1] == '':
+                        tail.pop()
+                    if not from_start:
+                        tail = tail[1:]  # the first line is probably cut off
+                    if len(tail) >= lines or from_start or range_bytes >= LOG_TAIL_MAX_RANGE:
+                        return [line.rstrip('\r') for line in tail[-lines:]] if lines else []
+                    range_bytes *= 4
+                    continue
+
+                if r.status_code == 416:
+                    # Empty log
+                    if record is not None:
+                        self.finish_record(record, 0)
+                    return []
+
+                if not r.ok:
+                    print(f'HTTP: {r.status_code} from {fullurl}')
+                    if record is not None:
+                        self.finish_record(record, len(r.content))
+                    return []
+
+                # Range not honoured: keep only the last lines while streaming
+                ring = collections.deque(maxlen=max(lines, 1))
+                pending = b''
+                received = 0
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    pending += chunk
+                    parts = pending.split(b'\n')
+                    pending = parts.pop()
+                    ring.extend(parts[-ring.maxlen:])
+                if pending:
+                    ring.append(pending)
+                if record is not None:
+                    self.finish_record(record, received)
+                tail = [line.decode('utf-8', errors='replace').rstrip('\r') for line in ring]
+                return tail[-lines:] if lines else []
+
+    #
     # Performs an HTTP PUT which updates the entity
     #
     def put(self, path, data):
-        headers = {}
-        if self.apiSession != None:
-            headers['x-api-session'] = self.apiSession 
-
-        if 'XSRF-TOKEN' in self.cookies:
-            headers['X-XSRF-TOKEN'] = self.cookies['XSRF-TOKEN']
-        
-        self.trace(f'PUT /mvcm-api{path}' )
-        self.trace('Headers')
-        self.traceheaders(headers)
-        self.trace('Cookies')
-        self.traceheaders(self.cookies)
-        self.trace('')
-        self.trace(json.dumps(data, indent=2))
+        if self.traceon:
+            self.trace(f'PUT /mvcm-api{path}' )
+            self.trace('Headers')
+            self.traceheaders(self.session.headers)
+            self.trace('Cookies')
+            self.traceheaders(self.cookies)
+            self.trace('')
+            self.trace(json.dumps(data, indent=2))
 
-        r = requests.put(url=self.mkurl(path) ,headers = headers, verify=False, json=data, cookies=self.cookies)
-        self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
-        self.traceheaders(r.headers)
-        self.trace('')
+        r = self.request('PUT', path, json=data)
+        if self.traceon:
+            self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+            self.traceheaders(r.headers)
+            self.trace('')
         if not r.ok:
             print(f'HTTP: {r.status_code} from {self.mkurl(path)}')
         return r
 
     #
-    # Performs an HTTP POST, which creates an entity
+    # Performs an HTTP POST, which creates an entity.  retry=True lets the
+    # transport retry it like an idempotent request; r.attempts then says
+    # how many times it was sent, since a retried create can find the
+    # entity made by an attempt whose response was lost.
     #
-    def post(self, path, content=None):
-        headers = {}
-        if self.apiSession is not None:  # Changed to match postbinary's check
-            headers['x-api-session'] = self.apiSession
-
-        if 'XSRF-TOKEN' in self.cookies:  # Changed to match postbinary's check
-            headers['X-XSRF-TOKEN'] = self.cookies['XSRF-TOKEN']
-        
-        self.trace(f'POST /mvcm-api{path}')
-        self.trace('Headers')
-        self.traceheaders(headers)
-        self.trace('Cookies')
-        self.traceheaders(self.cookies)
-        self.trace('')
-        self.trace('Content: ' + str(content))
-        self.trace(json.dumps(content, indent=2))
-        
-        try:  # Added try-except block like postbinary
-            r = requests.post(
-                url=self.mkurl(path),
-                headers=headers,
-                json=content,
-                cookies=self.cookies,
-                verify=False
-            )
-
-            # Update cookies directly from response cookies like postbinary
-            self.cookies.update(r.cookies)
-            
-            self.trace('Response:')
-            self.trace(f'   {r.status_code} {HTTPStatus(r.status_code).phrase}')
-            self.traceheaders(r.headers)
+    def post(self, path, content=None, retry=False):
+        if self.traceon:
+            self.trace(f'POST /mvcm-api{path}')
+            self.trace('Headers')
+            self.traceheaders(self.session.headers)
+            self.trace('Cookies')
+            self.traceheaders(self.cookies)
             self.trace('')
+            self.trace(json.dumps(content, indent=2))
+        
+        try:
+            r = self.request('POST', path, json=content, retry=retry)
+
+            if self.traceon:
+                self.trace('Response:')
+                self.trace(f'   {r.status_code} {HTTPStatus(r.status_code).phrase}')
+                self.traceheaders(r.headers)
+                self.trace('')
             
             if not r.ok:
                 print(f'    HTTP: {r.status_code} from {self.mkurl(path)}')
-                print(f'    Request headers sent: {headers}')
+                print(f'    Request headers sent: {dict(r.request.headers)}')
                 print(f'    Response headers: {dict(r.headers)}')
                 print(f'    Response content: {r.text}')
                 
@@ -231,50 +1012,47 @@ class Mvcm:
             raise
 
 
-    def postbinary(self, path, file_path):
-        headers = {}
-        if self.apiSession is not None:
-            headers['x-api-session'] = self.apiSession 
-
-        if 'XSRF-TOKEN' in self.cookies:
-            headers['X-XSRF-TOKEN'] = self.cookies['XSRF-TOKEN']
-
-        self.trace(f'POST /mvcm-api{path}')
-        self.trace('Headers')
-        self.traceheaders(headers)
-        self.trace('Cookies')
-        self.traceheaders(self.cookies)
-        self.trace('')
+    #
+    # Uploads a file as multipart/form-data, streaming it from disk.
+    # progress(bytes_sent, total_bytes) is called as the body is sent and
+    # the upload statistics are kept in self.last_upload.
+    #
+    def postbinary(self, path, file_path, progress=None):
+        if self.traceon:
+            self.trace(f'POST /mvcm-api{path}')
+            self.trace('Headers')
+            self.traceheaders(self.session.headers)
+            self.trace('Cookies')
+            self.traceheaders(self.cookies)
+            self.trace('')
 
         try:
-            # Check if file exists and is not empty
-            if os.path.getsize(file_path) == 0:
-                raise ValueError("File is empty. No data to upload.")
-
-            self.trace(f'File size: {os.path.getsize(file_path)} bytes')
-
-            # Create the multipart encoder
             filename = os.path.basename(file_path)
             with open(file_path, 'rb') as f:
-                files = {'file': (filename, f, 'application/octet-stream')}
-                
+                body = MultipartFileStream(f, filename, progress=progress)
+
+                # Check the file is not empty
+                if body.file_size == 0:
+                    raise ValueError("File is empty. No data to upload.")
+
+                if self.traceon:
+                    self.trace(f'File size: {body.file_size} bytes')
+
                 # Send the request
-                r = requests.post(
-                    self.mkurl(path),
-                    headers=headers,
-                    files=files,
-                    cookies=self.cookies,
-                    verify=False
-                )
-
-            self.cookies.update(r.cookies)
-            self.trace('Response:')
-            self.trace(f'   {r.status_code} {HTTPStatus(r.status_code).phrase}')
-            self.traceheaders(r.headers)
+                r = self.request('POST', path, data=body,
+                                 headers={'Content-Type': body.content_type})
+
+            self.last_upload = body.stats()
+            if self.traceon:
+                self.trace(f"Uploaded {self.last_upload['bytes']} bytes in {self.last_upload['seconds']:.2f}s "
+                           f"(peak buffer {self.last_upload['peak_buffer_bytes']} bytes)")
+                self.trace('Response:')
+                self.trace(f'   {r.status_code} {HTTPStatus(r.status_code).phrase}')
+                self.traceheaders(r.headers)
             
             if not r.ok:
                 print(f'    HTTP: {r.status_code} from {self.mkurl(path)}')
-                print(f'    Request headers sent: {headers}')
+                print(f'    Request headers sent: {dict(r.request.headers)}')
                 print(f'    Response headers: {dict(r.headers)}')
                 print(f'    Response content: {r.text}')
                 
@@ -289,48 +1067,26 @@ class Mvcm:
     # Performs an HTTP DELETE, which removes the entity
     #
     def delete(self, path):
-        headers = {}
-        headers = {}
-        if self.apiSession != None:
-            headers['x-api-session'] = self.apiSession 
-
-        if 'XSRF-TOKEN' in self.cookies:
-            headers['X-XSRF-TOKEN'] = self.cookies['XSRF-TOKEN']
-
-        self.trace(f'DELETE /mvcm-api{path}' )
-        self.traceheaders(headers)
-        self.trace('')
-        r = requests.delete(url=self.mkurl(path) ,headers = headers, verify=False, cookies=self.cookies)
-        self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+        if self.traceon:
+            self.trace(f'DELETE /mvcm-api{path}' )
+            self.traceheaders(self.session.headers)
+            self.trace('')
+        r = self.request('DELETE', path)
+        if self.traceon:
+            self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
         return r
 
-    def merge_configurations(self, username, source_hostname, target_hostname, merge_base_dir, source_extract_dir, target_extract_dir, merge_file_dir):
-        def clear_directory(directory):
-            # Walk the directory tree from the bottom up
-            for root, dirs, files in os.walk(directory, topdown=False):
-                for name in files:
-                    file_path = os.path.join(root, name)
-                    try:
-                        # Ensure the file is writable
-                        os.chmod(file_path, 0o777)
-                        os.remove(file_path)
-                    except Exception as e:
-                        print(f"Could not delete file {file_path}: {e}")
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    try:
-                        os.chmod(dir_path, 0o777)
-                        os.rmdir(dir_path)
-                    except Exception as e:
-                        print(f"Could not delete directory {dir_path}: {e}")
-
+    #
+    # Merges source_Merge.zip and target_Merge.zip in merge_base_dir into
+    # <SOURCE>_<TARGET>_Merged_V<version>_<date>.zip next to them: the
+    # source configuration with licensemanager, tomcat and security taken
+    # from the target.  The archive is written zip to zip (see configzip),
+    # so the extract/merge directories are no longer used and are only
+    # accepted for compatibility.  Returns the path of the merged zip.
+    #
+    def merge_configurations(self, username, source_hostname, target_hostname, merge_base_dir,
+                             source_extract_dir=None, target_extract_dir=None, merge_file_dir=None):
         try:
-
-            # Optionally clear the directories without admin rights
-            for dir_path in [source_extract_dir, target_extract_dir, merge_file_dir]:
-                if os.path.exists(dir_path):
-                    clear_directory(dir_path)  # use the helper function defined above
-
             # Define source and target zip paths within the base directory
             source_zip = os.path.join(merge_base_dir, "source_Merge.zip")
             target_zip = os.path.join(merge_base_dir, "target_Merge.zip")
@@ -338,118 +1094,35 @@ class Mvcm:
             print(f"\nSource zip size: {os.path.getsize(source_zip)} bytes")
             print(f"Target zip size: {os.path.getsize(target_zip)} bytes")
 
-            print("\nExtracting source zip...")
-            with zipfile.ZipFile(source_zip, 'r') as zip_ref:
-                zip_ref.extractall(source_extract_dir)
-
-            print("\nExtracting target zip...")
-            with zipfile.ZipFile(target_zip, 'r') as zip_ref:
-                zip_ref.extractall(target_extract_dir)
-
-            print("\nCopying all files from source...")
-            for item in os.listdir(source_extract_dir):
-                s = os.path.join(source_extract_dir, item)
-                d = os.path.join(merge_file_dir, item)
-                if os.path.isdir(s):
-                    shutil.copytree(s, d)
-                else:
-                    shutil.copy2(s, d)
-
-            print("\nDeleting directories from merge that will be replaced:")
-            directories_to_replace = ['licensemanager', 'tomcat', 'security']
-            for directory in directories_to_replace:
-                merged_dir_path = os.path.join(merge_file_dir, directory)
-                if os.path.exists(merged_dir_path):
-                    print(f"- Deleting /{directory}")
-                    shutil.rmtree(merged_dir_path)
-
-            print("\nCopying directories from target:")
-            for directory in directories_to_replace:
-                target_dir_path = os.path.join(target_extract_dir, directory)
-                merged_dir_path = os.path.join(merge_file_dir, directory)
-                if os.path.exists(target_dir_path):
-                    print(f"- Copying /{directory}")
-                    shutil.copytree(target_dir_path, merged_dir_path)
-
             # Create merged zip file with specific naming convention
             current_date = datetime.now().strftime("%d%b%Y").upper()
             version = "4.1.05"
             source_server = source_hostname.split('.')[0].upper()
             target_server = target_hostname.split('.')[0].upper()
             merged_zip_name = f"{source_server}_{target_server}_Merged_V{version}_{current_date}"
-
-            # Update descriptor.xml if it exists
-            descriptor_path = os.path.join(merge_file_dir, "descriptor.xml")
-            if os.path.exists(descriptor_path):
-                print("\nUpdating descriptor.xml...")
-                # Read the current content
-                with open(descriptor_path, 'r') as file:
-                    content = file.read()
-                
-                # Parse XML
-                root = ET.fromstring(content)
-                
-                # Update the name field
-                name_element = root.find('name')
-                if name_element is not None:
-                    name_element.text = f"{source_server}_{target_server}_Merged_V{version}_{current_date}"
-                    print(f"Updated name in descriptor.xml to: {name_element.text}")
-
-                # Update the description field
-                description_element = root.find('description')
-                if description_element is not None:
-                    description_element.text = f"Config from {source_server} brought to {target_server} on {current_date}"
-                    print(f"Updated description in descriptor.xml to: {description_element.text}")
-
-                # Write back the modified XML
-                tree = ET.ElementTree(root)
-                tree.write(descriptor_path, encoding='utf-8', xml_declaration=True)
-                
-                # Format the XML file with proper indentation
-                with open(descriptor_path, 'r') as file:
-                    xml_content = file.read()
-                dom = xml.dom.minidom.parseString(xml_content)
-                pretty_xml = dom.toprettyxml(indent="    ")
-                with open(descriptor_path, 'w') as file:
-                    file.write(pretty_xml)
-            else:
-                print("Warning: descriptor.xml not found in merge directory")
-
-            merged_zip_path = os.path.join(merge_base_dir, merged_zip_name)
+            merged_zip_path = os.path.join(merge_base_dir, f"{merged_zip_name}.zip")
 
             # Clean up any existing zip file
-            if os.path.exists(f"{merged_zip_path}.zip"):
-                os.remove(f"{merged_zip_path}.zip")
+            if os.path.exists(merged_zip_path):
+                os.remove(merged_zip_path)
 
             print("\nCreating merged zip file...")
-            # Change to the parent directory of mergeFile
-            original_dir = os.getcwd()
-            os.chdir(merge_base_dir)
-            
-            # Create the zip file using shutil.make_archive
-            shutil.make_archive(merged_zip_path, 'zip', 'mergeFile')
-            
-            # Change back to the original directory
-            os.chdir(original_dir)
+            summary = configzip.merge_archives(
+                source_zip, target_zip, merged_zip_path,
+                name=merged_zip_name,
+                description=f"Config from {source_server} brought to {target_server} on {current_date}")
 
             print(f"\nMerged zip contents:")
-            with zipfile.ZipFile(f"{merged_zip_path}.zip", 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                print(f"Total files: {len(file_list)}")
-                print("Key directories:")
-                for d in directories_to_replace:
-                    files = [f for f in file_list if f.startswith(f"{d}/")]
-                    print(f"- /{d}/: {len(files)} files")
-
-            # Create a copy with a 'c' prefix NO COPY CREATED 
-            copy_zip_name = f"c{merged_zip_name}.zip"
-            copy_zip_path = os.path.join(merge_base_dir, copy_zip_name)
+            print(f"Total files: {summary['members']} ({summary['copied']} copied as stored)")
+            print("Key directories:")
+            for d in configzip.TARGET_DIRECTORIES:
+                print(f"- /{d}/: {summary['directories'][d]} files")
 
             print(f"\nMerged zip files created:")
-            print(f"- Original Location: {merged_zip_path}.zip")
-            print(f"- Size: {os.path.getsize(f'{merged_zip_path}.zip')} bytes")
+            print(f"- Original Location: {merged_zip_path}")
+            print(f"- Size: {os.path.getsize(merged_zip_path)} bytes")
 
-            return f"{merged_zip_path}.zip"
+            return merged_zip_path
 
         except Exception as e:
             print(f"Error during merge: {str(e)}")
@@ -459,6 +1132,7 @@ class Mvcm:
     #
     def exiting(self):
         self.trace('exiting')
+        self.close()
 
 
     #
@@ -471,9 +1145,23 @@ class Mvcm:
     #
     # Prints the HTTP headers, if traceon is true
     def traceheaders(self, headers):
+        if not self.traceon:
+            return
         for k in headers.keys():
             self.trace(f'    {k}: {headers[k]}' )
 
+    #
+    # Prints a response status, headers and body (pretty JSON when it is JSON)
+    #
+    def traceresponse(self, r):
+        self.trace(f'{r.status_code} {HTTPStatus(r.status_code).phrase}')
+        self.traceheaders(r.headers)
+        self.trace('')
+        try:
+            self.trace(json.dumps(r.json(), indent=2))
+        except ValueError:
+            self.trace('content: ' + str(r.content))
+
 
     #
     # Creates a full URL from the partial path
@@ -485,6 +1173,14 @@ class Mvcm:
             url = 'http://' + self.host  + '/mvcm-api' + path
         return url
 
+    #
+    # Creates the full URL of a log from its partial path; logs come from
+    # log_host, not the connected server
+    #
+    def logurl(self, path):
+        scheme = 'https' if self.encrypted else 'http'
+        return f'{scheme}://{self.log_host}/mvcm-api{path}'
+
 
 
     #
@@ -502,6 +1198,151 @@ class Mvcm:
 
 
 
+# Every SessionManager, closed by one exit hook
+_session_managers = weakref.WeakSet()
+
+
+def _close_session_managers():
+    for manager in list(_session_managers):
+        manager.close()
+
+
+atexit.register(_close_session_managers)
+
+
+#
+# Keeps one logged-on Mvcm per hostname so switching servers, opening new
+# panels or running an update re-uses the live session instead of doing
+# /productinfo + /viewerlogon again.  Safe to use from worker threads;
+# concurrent requests for the same host wait for a single logon.
+#
+class SessionManager:
+
+    def __init__(self, **mvcm_kwargs):
+        self.mvcm_kwargs = mvcm_kwargs
+        self.clients = {}  # hostname -> logged-on Mvcm
+        self.lock = threading.Lock()
+        self.host_locks = {}
+        _session_managers.add(self)
+
+    #
+    # Returns the logged-on Mvcm for host, logging on only the first time
+    # (or when the credentials changed / the session was invalidated)
+    #
+    def connect(self, host, user, password):
+        with self.lock:
+            host_lock = self.host_locks.setdefault(host, threading.Lock())
+        with host_lock:
+            client = self.clients.get(host)
+            if client is not None and client.user == user and client.password == password:
+                return client
+            if client is not None:
+                client.close()
+            client = Mvcm(**self.mvcm_kwargs)
+            client.connect(host, user, password)
+            with self.lock:
+                self.clients[host] = client
+            return client
+
+    def get(self, host):
+        return self.clients.get(host)
+
+    #
+    # Forgets the session for host, e.g. after the server expired it
+    #
+    def invalidate(self, host):
+        with self.lock:
+            client = self.clients.pop(host, None)
+        if client is not None:
+            client.close()
+
+    def close(self):
+        with self.lock:
+            clients = list(self.clients.values())
+            self.clients = {}
+        for client in clients:
+            client.close()
+
+
+#
+# asyncio facade over Mvcm.  Every call runs the blocking Mvcm verb on a
+# worker thread (sharing the pooled keep-alive session) and is limited by a
+# per-host semaphore, so hundreds of calls can be gathered without opening
+# more than max_concurrency connections to one host:
+#
+#     client = AsyncMvcm(max_concurrency=8)
+#     await client.connect(host, user, password)
+#     responses = await asyncio.gather(*(client.post(p, body) for p in paths))
+#
+class AsyncMvcm:
+
+    def __init__(self, mvcm=None, max_concurrency=DEFAULT_POOL_SIZE, encrypted=True):
+        self.max_concurrency = max_concurrency
+        if mvcm is None:
+            mvcm = Mvcm(pool_size=max_concurrency, encrypted=encrypted)
+        self.mvcm = mvcm
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix='AsyncMvcm')
+        # event loop -> {hostname: asyncio.Semaphore}, sized by this client
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    #
+    # Returns the semaphore limiting this client's concurrent calls to host
+    # on the running loop
+    #
+    def semaphore(self, host):
+        loop = asyncio.get_running_loop()
+        per_loop = self.semaphores.setdefault(loop, {})
+        sem = per_loop.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency)
+            per_loop[host] = sem
+        return sem
+
+    async def _call(self, host, fn, *args, **kwargs):
+        async with self.semaphore(host):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def connect(self, host, user, password):
+        return await self._call(host, self.mvcm.connect, host, user, password)
+
+    async def logon(self):
+        return await self._call(self.mvcm.host, self.mvcm.logon)
+
+    async def get(self, path, contentType='application/json', cache=False, max_age=None):
+        return await self._call(self.mvcm.host, self.mvcm.get, path, contentType, cache, max_age)
+
+    async def getzip(self, path, contentType='zip'):
+        return await self._call(self.mvcm.host, self.mvcm.getzip, path, contentType)
+
+    async def download(self, path, dest_path, chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None, resume=False):
+        return await self._call(self.mvcm.host, self.mvcm.download, path, dest_path, chunk_size, progress,
+                                resume=resume)
+
+    async def getlog(self, server_name):
+        return await self._call(self.mvcm.host, self.mvcm.getlog, server_name)
+
+    async def getlog_tail(self, server_name, lines=3, range_bytes=LOG_TAIL_RANGE):
+        return await self._call(self.mvcm.host, self.mvcm.getlog_tail, server_name, lines, range_bytes)
+
+    async def put(self, path, data):
+        return await self._call(self.mvcm.host, self.mvcm.put, path, data)
+
+    async def post(self, path, content=None, retry=False):
+        return await self._call(self.mvcm.host, self.mvcm.post, path, content, retry)
+
+    async def postbinary(self, path, file_path, progress=None):
+        return await self._call(self.mvcm.host, self.mvcm.postbinary, path, file_path, progress)
+
+    async def delete(self, path):
+        return await self._call(self.mvcm.host, self.mvcm.delete, path)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.mvcm.close()
+
+
 '''if __name__ == "__main__":
     connector = Mvcm()
     connectInfo = ConnectInfo()
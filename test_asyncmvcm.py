@@ -0,0 +1,133 @@
+#!/usr/bin/python
+
+import asyncio
+import os
+import tempfile
+import threading
+import zipfile
+
+import pytest
+
+import fake_mvcm
+import mvcm
+
+#
+# AsyncMvcm against the local stand-in server (fake_mvcm.py)
+#
+
+USER = 'test'
+PASSWORD = 'test'
+
+
+@pytest.fixture
+def server():
+    server = fake_mvcm.FakeMvcmServer(zip_size=256 * 1024, config_count=3)
+    server.start()
+    yield server
+    server.stop()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_gather_is_bounded_per_host(server):
+    client = mvcm.AsyncMvcm(max_concurrency=4, encrypted=False)
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+    post = client.mvcm.post
+
+    def counting_post(*args, **kwargs):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        try:
+            return post(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight['now'] -= 1
+
+    client.mvcm.post = counting_post
+
+    async def main():
+        await client.connect(server.host, USER, PASSWORD)
+        return await asyncio.gather(*(client.post(f'/ccs/servers/ASYNC{i:03d}', {'description': 'async'})
+                                      for i in range(200)))
+
+    try:
+        responses = run(main())
+    finally:
+        client.close()
+    assert all(r.status_code == 201 for r in responses)
+    assert len(server.ccs_servers) == 200
+    assert 1 < in_flight['max'] <= 4
+
+
+def test_semaphores_are_sized_per_client(server):
+    small = mvcm.AsyncMvcm(max_concurrency=2, encrypted=False)
+    large = mvcm.AsyncMvcm(max_concurrency=6, encrypted=False)
+
+    async def main():
+        return small.semaphore(server.host), large.semaphore(server.host)
+
+    try:
+        small_sem, large_sem = run(main())
+    finally:
+        small.close()
+        large.close()
+    assert small_sem is not large_sem
+    assert small_sem._value == 2 and large_sem._value == 6
+
+
+def test_verbs(server):
+    client = mvcm.AsyncMvcm(encrypted=False)
+    workdir = tempfile.mkdtemp()
+    dest = os.path.join(workdir, 'config_000.zip')
+
+    async def main():
+        await client.connect(server.host, USER, PASSWORD)
+        listed = await client.get('/saved-configurations')
+        created = await client.post('/saved-configurations/async_config', {'name': 'async_config'})
+        archive = await client.getzip('/saved-configurations/config_000')
+        download = await client.download('/saved-configurations/config_000', dest, resume=True)
+        uploaded = await client.postbinary('/saved-configurations', dest)
+        deleted = await client.delete('/saved-configurations/async_config')
+        return listed, created, archive, download, uploaded, deleted
+
+    try:
+        listed, created, archive, download, uploaded, deleted = run(main())
+    finally:
+        client.close()
+    assert listed.ok and len(listed.json()) == 3
+    assert created.ok and deleted.ok and uploaded.ok
+    assert archive.ok and download['ok']
+    assert download['size'] == len(archive.content)
+    with zipfile.ZipFile(dest) as f:
+        assert f.testzip() is None
+
+
+def test_download_resumes(server):
+    client = mvcm.AsyncMvcm(encrypted=False)
+    dest = os.path.join(tempfile.mkdtemp(), 'config_001.zip')
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(done, total):
+        if done >= total // 2:
+            raise Interrupted()
+
+    async def main():
+        await client.connect(server.host, USER, PASSWORD)
+        with pytest.raises(Interrupted):
+            await client.download('/saved-configurations/config_001', dest, progress=interrupt, resume=True)
+        return await client.download('/saved-configurations/config_001', dest, resume=True)
+
+    try:
+        result = run(main())
+    finally:
+        client.close()
+    assert result['ok'] and result['resumed_from'] > 0
+    assert result['size'] == os.path.getsize(dest)
+    with zipfile.ZipFile(dest) as f:
+        assert f.testzip() is None
@@ -0,0 +1,238 @@
+#!/usr/bin/python
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+#
+# On-disk cache of cleaned Excel sheets, so re-opening an unchanged
+# workbook doesn't go through openpyxl again.  Entries are keyed by the
+# sha256 of the workbook's content (so a copied or re-saved but identical
+# file still hits) plus the sheet; the hash itself is remembered per
+# path, size and mtime so an unchanged file isn't even read.
+#
+# A sheet is stored as JSON lines: a line with its headers followed by
+# one line per batch of rows, each batch laid out column by column.  The
+# directory is user-writable, so nothing in it is ever loaded in a way
+# that can run code; the cell types JSON lacks (dates, times, durations)
+# are written as small tagged objects.  Reading a sheet back is one
+# json.loads per batch and, like ExcelParser.stream_excel, never holds
+# more than a batch.  The least recently used sheets are evicted once the
+# cache is over max_bytes.
+#
+
+DEFAULT_WORKBOOK_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.bmc_api_app', 'workbooks')
+
+# Disk the cached sheets may use before the least recently used are evicted
+DEFAULT_WORKBOOK_CACHE_BYTES = 512 * 1024 * 1024
+
+# Bump when the stored layout or the cleaning rules change
+CACHE_FORMAT = 2
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Cells JSON has no type for, as {tag: isoformat / seconds}; sheet cells
+# are never dicts, so a tagged object can't be mistaken for a value
+_DATETIME_TAGS = (
+    ('$datetime', datetime.datetime),
+    ('$date', datetime.date),
+    ('$time', datetime.time),
+)
+
+
+def _encode_cell(value):
+    for tag, cls in _DATETIME_TAGS:
+        if isinstance(value, cls):
+            return {tag: value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'$timedelta': value.total_seconds()}
+    raise TypeError(f'Cannot cache a cell of type {type(value).__name__}')
+
+
+def _decode_cell(obj):
+    for tag, cls in _DATETIME_TAGS:
+        if tag in obj:
+            return cls.fromisoformat(obj[tag])
+    if '$timedelta' in obj:
+        return datetime.timedelta(seconds=obj['$timedelta'])
+    return obj
+
+
+def _dump_line(obj, f):
+    f.write(json.dumps(obj, default=_encode_cell))
+    f.write('\n')
+
+
+class WorkbookCache:
+
+    def __init__(self, root=DEFAULT_WORKBOOK_CACHE_DIR, max_bytes=DEFAULT_WORKBOOK_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, 'index.json')
+        try:
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+        if self.index.get('format') != CACHE_FORMAT:
+            # Sheets stored in an older layout are never read, only removed
+            self.remove_entries(self.index.get('entries', {}))
+            self.index = {'format': CACHE_FORMAT, 'entries': {}, 'fingerprints': {}, 'sheet_names': {}}
+
+    def save_index(self):
+        part_path = f'{self.index_path}.{uuid.uuid4().hex}.part'
+        with open(part_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(part_path, self.index_path)
+
+    #
+    # sha256 of the workbook, hashed only when its path, size or mtime are
+    # new to the cache
+    #
+    def fingerprint(self, file_path):
+        stat = os.stat(file_path)
+        key = f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+        with self.lock:
+            digest = self.index['fingerprints'].get(key)
+        if digest is not None:
+            return digest
+
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self.lock:
+            self.index['fingerprints'][key] = digest
+            self.save_index()
+        return digest
+
+    @staticmethod
+    def entry_name(digest, sheet_name):
+        sheet = hashlib.sha1(repr(sheet_name).encode('utf-8')).hexdigest()[:12]
+        return f'{digest}-{sheet}.sheet'
+
+    def touch(self, name):
+        self.index['entries'][name]['used'] = time.time()
+        self.save_index()
+
+    def get_sheet_names(self, file_path):
+        digest = self.fingerprint(file_path)
+        with self.lock:
+            return self.index['sheet_names'].get(digest)
+
+    def store_sheet_names(self, file_path, sheet_names):
+        digest = self.fingerprint(file_path)
+        with self.lock:
+            self.index['sheet_names'][digest] = list(sheet_names)
+            self.save_index()
+
+    #
+    # Returns (headers, rows generator) of a cached sheet, or None
+    #
+    def open_sheet(self, file_path, sheet_name):
+        name = self.entry_name(self.fingerprint(file_path), sheet_name)
+        path = os.path.join(self.root, name)
+        with self.lock:
+            if name not in self.index['entries']:
+                return None
+            try:
+                f = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                del self.index['entries'][name]
+                self.save_index()
+                return None
+            self.touch(name)
+
+        try:
+            header = json.loads(f.readline())
+        except Exception:
+            f.close()
+            return None
+        return header['headers'], self._iter_rows(f)
+
+    @staticmethod
+    def _iter_rows(f):
+        with f:
+            for line in f:
+                yield from zip(*json.loads(line, object_hook=_decode_cell))
+
+    #
+    # Passes rows through while writing them to the cache in batches of
+    # batch_size; the entry only becomes visible once every row has been
+    # read, so a preview abandoned half way stores nothing
+    #
+    def record(self, file_path, sheet_name, headers, rows, batch_size):
+        name = self.entry_name(self.fingerprint(file_path), sheet_name)
+        path = os.path.join(self.root, name)
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        complete = False
+        try:
+            with open(part_path, 'w', encoding='utf-8') as f:
+                _dump_line({'headers': list(headers)}, f)
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    yield row
+                    if len(batch) >= batch_size:
+                        _dump_line(list(zip(*batch)), f)
+                        batch = []
+                if batch:
+                    _dump_line(list(zip(*batch)), f)
+            os.replace(part_path, path)
+            complete = True
+            with self.lock:
+                self.index['entries'][name] = {'size': os.path.getsize(path), 'used': time.time()}
+                self.evict(keep=name)
+                self.save_index()
+        finally:
+            if not complete and os.path.exists(part_path):
+                os.remove(part_path)
+
+    def stored_bytes(self):
+        return sum(entry['size'] for entry in self.index['entries'].values())
+
+    def remove_entries(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+
+    #
+    # Deletes the least recently used sheets until the cache fits in
+    # max_bytes (never the entry `keep`), and forgets the fingerprints and
+    # sheet names of the workbooks whose last sheet this pass removed;
+    # workbooks that never had a sheet cached keep theirs
+    #
+    def evict(self, keep=None):
+        with self.lock:
+            entries = self.index['entries']
+            total = self.stored_bytes()
+            evicted = []
+            for name in sorted(entries, key=lambda n: entries[n]['used']):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                total -= entries.pop(name)['size']
+                evicted.append(name)
+            self.remove_entries(evicted)
+
+            cached = {name.split('-', 1)[0] for name in entries}
+            gone = {name.split('-', 1)[0] for name in evicted} - cached
+            if gone:
+                self.index['fingerprints'] = {k: d for k, d in self.index['fingerprints'].items() if d not in gone}
+                self.index['sheet_names'] = {d: n for d, n in self.index['sheet_names'].items() if d not in gone}
+
+    def clear(self):
+        with self.lock:
+            self.remove_entries(list(self.index['entries']))
+            self.index = {'format': CACHE_FORMAT, 'entries': {}, 'fingerprints': {}, 'sheet_names': {}}
+            self.save_index()